@@ -63,6 +63,23 @@ def calculate_position_skill(row, weights, pos_name):
     final_score = (sum(scores) / len(scores)) * 10
     return final_score
 
+def player_data_is_current():
+    """
+    Check whether OUTPUT_CSV is newer than everything it is generated from.
+
+    The CSV only depends on the Excel export, the attribute weights and this
+    module's formulas, so when none of them changed since the last save the
+    Excel parse in update_player_data() can be skipped.
+    """
+    if not os.path.exists(OUTPUT_CSV):
+        return False
+
+    csv_mtime = os.path.getmtime(OUTPUT_CSV)
+    for source in [EXCEL_FILE, WEIGHTS_FILE, os.path.abspath(__file__)]:
+        if os.path.exists(source) and os.path.getmtime(source) > csv_mtime:
+            return False
+    return True
+
 def update_player_data():
     """
     Read 'Paste Full' from Excel, calculate skills, handle loans, and save to CSV.
@@ -9,6 +9,7 @@ Author: Doug Mason (2025)
 
 import sys
 import json
+from functools import lru_cache
 import pandas as pd
 import numpy as np
 from scipy.optimize import linear_sum_assignment
@@ -21,6 +22,24 @@ from unidecode import unidecode
 # Players below this threshold will not be selected regardless of other bonuses
 MIN_POSITION_FAMILIARITY = 12
 
+# Bounds of the position-specific consecutive match thresholds returned by
+# MatchReadySelector._get_rotation_threshold_for_player (DM/WB: 2 ... GK/CB: 5)
+ROTATION_THRESHOLD_MIN = 2
+ROTATION_THRESHOLD_MAX = 5
+
+# Base familiarity penalty indexed by whole positional rating (0-20)
+# Natural (18-20): 100%, Accomplished (15-17): 99%, Competent (12-14): 90%,
+# Unconvincing (9-11): 75%, Awkward (5-8): 55%, Makeshift (1-4): 35%
+FAMILIARITY_BASE_PENALTY = (
+    (1.00,) +
+    (0.65,) * 4 +
+    (0.45,) * 4 +
+    (0.25,) * 3 +
+    (0.10,) * 3 +
+    (0.01,) * 3 +
+    (0.00,) * 3
+)
+
 
 def normalize_name(name):
     """Normalize player names for consistent string comparison.
@@ -33,6 +52,53 @@ def normalize_name(name):
     return unidecode(str(name)).lower().strip()
 
 
+@lru_cache(maxsize=None)
+def _cached_fatigue_threshold(age: Optional[float], natural_fitness: Optional[float],
+                              stamina: Optional[float], injury_proneness: Optional[float]) -> float:
+    """
+    Memoized core of MatchReadySelector._get_adjusted_fatigue_threshold.
+
+    The inputs are small whole-number attributes, so the same handful of
+    combinations repeat for every position and match evaluated. Missing
+    values are passed as None.
+    """
+    # Start with base threshold
+    threshold = 400.0
+
+    # Age adjustments (applied first)
+    if age is not None:
+        if age >= 32:
+            threshold = 300.0  # Highly sensitive for veterans
+        elif age >= 30:
+            threshold = 350.0  # More sensitive for aging players
+        elif age < 19:
+            threshold = 350.0  # Burnout risk for youth
+
+    # Natural Fitness modifiers
+    if natural_fitness is not None:
+        if natural_fitness < 10:
+            threshold -= 50  # Poor fitness = lower threshold
+        elif natural_fitness >= 15:
+            threshold += 50  # Excellent fitness = higher threshold
+
+    # Stamina modifiers
+    if stamina is not None:
+        if stamina < 10:
+            threshold -= 50  # Poor stamina = tires faster
+        elif stamina >= 15:
+            threshold += 30  # Good stamina = sustains load better
+
+    # Injury Proneness modifiers (FM26 Unity Engine - critical factor)
+    if injury_proneness is not None:
+        if injury_proneness >= 15:
+            threshold -= 100  # CRITICAL: Highly injury-prone players are fragile
+        elif injury_proneness <= 8:
+            threshold += 50  # Low injury risk = can handle higher load
+
+    # Ensure threshold doesn't go below 200 or above 550
+    return max(200.0, min(550.0, threshold))
+
+
 class MatchReadySelector:
     """
     FM26 Match-Ready Lineup Selector with Unity Engine Research Integration.
@@ -228,6 +294,9 @@ class MatchReadySelector:
         # Cache for player hierarchy (position-specific rankings)
         self._player_hierarchy_cache = None
 
+        # Cache for position-specific rotation thresholds (player_name -> threshold)
+        self._rotation_threshold_cache = {}
+
         # Load persistent match tracking from JSON file
         tracking_data = self._load_match_tracking()
         self.player_match_count = tracking_data.get('match_counts', {})
@@ -238,10 +307,11 @@ class MatchReadySelector:
             player_count = len([c for c in self.player_match_count.values() if c > 0])
             print(f"Loaded match tracking: Last match counted was {self.last_match_counted} ({player_count} players with active streaks)")
 
-    def _calculate_pure_ability_rating(self, row: pd.Series, skill_col: str,
-                                        ability_col: Optional[str] = None) -> float:
+    def _calculate_pure_ability_rating_vec(self, df: pd.DataFrame, skill_col: str,
+                                           ability_col: Optional[str] = None) -> np.ndarray:
         """
-        Calculate pure ability rating with familiarity penalty under ideal conditions.
+        Calculate pure ability ratings with familiarity penalty under ideal conditions
+        for every player in df at one position.
 
         Used for hierarchy calculation (Starting XI / Second XI rankings).
         Assumes peak fitness/condition but applies familiarity penalty.
@@ -250,43 +320,40 @@ class MatchReadySelector:
         conditions, not match-day selection. Injuries are temporary.
 
         Args:
-            row: Player data row
+            df: Player DataFrame
             skill_col: Positional skill rating column (1-20 familiarity)
             ability_col: Role ability rating column (0-200 quality)
 
         Returns:
-            Effective ability rating (with familiarity penalty), or -999.0 if cannot play
+            Array of effective ratings aligned with df rows, -999.0 where the player cannot play
         """
-        # Get skill rating (familiarity) - required for position eligibility
-        skill_rating = row.get(skill_col, 0)
-        if pd.isna(skill_rating) or skill_rating < 1:
-            return -999.0  # Cannot play this position at all
-
-        # Check if below minimum familiarity threshold (12 = Competent)
-        below_threshold = skill_rating < MIN_POSITION_FAMILIARITY
+        n = len(df)
+        if skill_col in df.columns:
+            skill_rating = df[skill_col].to_numpy(dtype=float)
+        else:
+            skill_rating = np.zeros(n)
 
-        # Get ability rating if available (keep full scale ~50-200)
-        if ability_col and ability_col in row.index:
-            ability_rating = row.get(ability_col, 0)
-            if pd.notna(ability_rating) and ability_rating > 0:
-                base_rating = float(ability_rating)
-            else:
-                # Fallback: scale familiarity to approximate ability range
-                base_rating = float(skill_rating) * 5.0
+        # Ability rating as base where present, otherwise familiarity scaled up
+        scaled_skill = skill_rating * 5.0
+        if ability_col and ability_col in df.columns:
+            ability_rating = df[ability_col].to_numpy(dtype=float)
+            base_rating = np.where(ability_rating > 0, ability_rating, scaled_skill)
         else:
-            # Fallback: scale familiarity to approximate ability range
-            base_rating = float(skill_rating) * 5.0
+            base_rating = scaled_skill
 
-        # Apply familiarity penalty based on skill rating and Versatility
-        versatility = row.get('Versatility', 10)
-        familiarity_penalty = self._get_familiarity_penalty(skill_rating, versatility)
+        if 'Versatility' in df.columns:
+            versatility = df['Versatility'].to_numpy(dtype=float)
+        else:
+            versatility = np.full(n, 10.0)
+        familiarity_penalty = self._get_familiarity_penalty_vec(skill_rating, versatility)
         effective_rating = base_rating * (1 - familiarity_penalty)
 
-        # Apply heavy penalty for players below minimum familiarity threshold
-        if below_threshold:
-            effective_rating *= 0.30  # 70% penalty
+        # Heavy penalty for players below minimum familiarity threshold
+        effective_rating = np.where(skill_rating < MIN_POSITION_FAMILIARITY,
+                                    effective_rating * 0.30, effective_rating)
 
-        return effective_rating
+        # Missing or sub-1 familiarity means the player can't play here
+        return np.where(skill_rating >= 1, effective_rating, -999.0)
 
     def _calculate_player_hierarchy(self) -> Dict[str, Dict[str, Tuple[str, float]]]:
         """
@@ -315,6 +382,7 @@ class MatchReadySelector:
         # Include ALL players (including injured) - this is for squad planning
         available_df = self.df.copy()
         available_df = available_df.reset_index(drop=True)
+        player_names = available_df['Name'].to_numpy()
 
         n_players = len(available_df)
         n_positions = len(self.formation)
@@ -323,21 +391,18 @@ class MatchReadySelector:
         # Create cost matrix for pure ability ratings
         cost_matrix = np.full((n_players, n_positions), 999.0)
 
-        for i in range(n_players):
-            player = available_df.iloc[i]
-
-            for j, pos_info in enumerate(self.formation):
-                if len(pos_info) == 3:
-                    pos_name, skill_col, ability_col = pos_info
-                else:
-                    pos_name, skill_col = pos_info
-                    ability_col = None
-
-                # Calculate pure ability rating (no modifiers)
-                rating = self._calculate_pure_ability_rating(player, skill_col, ability_col)
+        # One vectorized rating pass per position instead of a per-player loop
+        for j, pos_info in enumerate(self.formation):
+            if len(pos_info) == 3:
+                pos_name, skill_col, ability_col = pos_info
+            else:
+                pos_name, skill_col = pos_info
+                ability_col = None
 
-                if rating > -999.0:
-                    cost_matrix[i, j] = -rating  # Negative for minimization
+            # Calculate pure ability rating (no modifiers)
+            ratings = self._calculate_pure_ability_rating_vec(available_df, skill_col, ability_col)
+            valid = ratings > -999.0
+            cost_matrix[valid, j] = -ratings[valid]  # Negative for minimization
 
         # Run Hungarian algorithm for First XI
         row_ind_first, col_ind_first = linear_sum_assignment(cost_matrix)
@@ -349,7 +414,7 @@ class MatchReadySelector:
         for i, j in zip(row_ind_first, col_ind_first):
             if cost_matrix[i, j] < 900:  # Valid assignment
                 pos_name = self.formation[j][0]
-                player_name = available_df.iloc[i]['Name']
+                player_name = player_names[i]
                 rating = -cost_matrix[i, j]
                 first_xi[pos_name] = (player_name, rating)
                 first_xi_player_indices.add(i)
@@ -369,7 +434,7 @@ class MatchReadySelector:
         for i, j in zip(row_ind_second, col_ind_second):
             if cost_matrix_second[i, j] < 900:  # Valid assignment
                 pos_name = self.formation[j][0]
-                player_name = available_df.iloc[i]['Name']
+                player_name = player_names[i]
                 rating = -cost_matrix_second[i, j]
                 second_xi[pos_name] = (player_name, rating)
 
@@ -745,19 +810,9 @@ class MatchReadySelector:
         if pd.isna(skill_rating) or skill_rating < 1:
             return 1.0  # Rating 0 or missing: Complete block
 
-        # Base penalty from research effectiveness data
-        if skill_rating >= 18:
-            base_penalty = 0.00  # Natural: 100%
-        elif skill_rating >= 15:
-            base_penalty = 0.01  # Accomplished: 99%
-        elif skill_rating >= 12:
-            base_penalty = 0.10  # Competent: 90%
-        elif skill_rating >= 9:
-            base_penalty = 0.25  # Unconvincing: 75%
-        elif skill_rating >= 5:
-            base_penalty = 0.45  # Awkward: 55%
-        else:
-            base_penalty = 0.65  # Makeshift (1-4): 35%
+        # Base penalty from research effectiveness data (thresholds are whole numbers,
+        # so flooring the rating picks the same rung as the original if/elif ladder)
+        base_penalty = FAMILIARITY_BASE_PENALTY[int(min(skill_rating, 20))]
 
         # Versatility modifier
         # vers 20 → modifier 0.5 (50% penalty reduction)
@@ -772,6 +827,33 @@ class MatchReadySelector:
         adjusted_penalty = base_penalty * versatility_modifier
         return min(adjusted_penalty, 0.80)  # Cap at 80% max penalty
 
+    def _get_familiarity_penalty_vec(self, skill_rating: np.ndarray, versatility: np.ndarray) -> np.ndarray:
+        """
+        Vectorized _get_familiarity_penalty over aligned rating/versatility arrays.
+
+        Args:
+            skill_rating: Familiarity ratings at the position (1-20)
+            versatility: Versatility hidden attributes (1-20)
+
+        Returns:
+            Array of penalties as decimals (1.0 where the rating is missing or below 1)
+        """
+        skill_rating = np.asarray(skill_rating, dtype=float)
+        versatility = np.asarray(versatility, dtype=float)
+
+        blocked = ~(skill_rating >= 1)  # NaN or below 1: complete block
+        rung = np.clip(np.nan_to_num(skill_rating, nan=0.0), 0, 20).astype(int)
+        base_penalty = np.asarray(FAMILIARITY_BASE_PENALTY)[rung]
+
+        versatility_modifier = np.where(
+            versatility > 0,  # False for NaN
+            np.clip(1.0 - ((versatility - 10) / 20), 0.5, 1.25),
+            1.0
+        )
+
+        penalty = np.minimum(base_penalty * versatility_modifier, 0.80)
+        return np.where(blocked, 1.0, penalty)
+
     def _get_adjusted_fatigue_threshold(self, age: float, natural_fitness: float, stamina: float, injury_proneness: float = None) -> float:
         """
         Calculate age/fitness/stamina/injury-adjusted fatigue threshold.
@@ -797,41 +879,48 @@ class MatchReadySelector:
         Returns:
             Adjusted fatigue threshold
         """
-        # Start with base threshold
-        threshold = 400.0
-
-        # Age adjustments (applied first)
-        if pd.notna(age):
-            if age >= 32:
-                threshold = 300.0  # Highly sensitive for veterans
-            elif age >= 30:
-                threshold = 350.0  # More sensitive for aging players
-            elif age < 19:
-                threshold = 350.0  # Burnout risk for youth
-
-        # Natural Fitness modifiers
-        if pd.notna(natural_fitness):
-            if natural_fitness < 10:
-                threshold -= 50  # Poor fitness = lower threshold
-            elif natural_fitness >= 15:
-                threshold += 50  # Excellent fitness = higher threshold
-
-        # Stamina modifiers
-        if pd.notna(stamina):
-            if stamina < 10:
-                threshold -= 50  # Poor stamina = tires faster
-            elif stamina >= 15:
-                threshold += 30  # Good stamina = sustains load better
-
-        # Injury Proneness modifiers (FM26 Unity Engine - critical factor)
-        if pd.notna(injury_proneness):
-            if injury_proneness >= 15:
-                threshold -= 100  # CRITICAL: Highly injury-prone players are fragile
-            elif injury_proneness <= 8:
-                threshold += 50  # Low injury risk = can handle higher load
-
-        # Ensure threshold doesn't go below 200 or above 550
-        return max(200.0, min(550.0, threshold))
+        # Missing attributes become None so every NaN shares one cache entry
+        return _cached_fatigue_threshold(
+            None if pd.isna(age) else float(age),
+            None if pd.isna(natural_fitness) else float(natural_fitness),
+            None if pd.isna(stamina) else float(stamina),
+            None if injury_proneness is None or pd.isna(injury_proneness) else float(injury_proneness),
+        )
+
+    def _get_adjusted_fatigue_threshold_vec(self, age: np.ndarray, natural_fitness: np.ndarray,
+                                            stamina: np.ndarray,
+                                            injury_proneness: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Vectorized _get_adjusted_fatigue_threshold over aligned attribute arrays.
+
+        NaN entries skip their modifier exactly like the scalar pd.notna() guards,
+        because every comparison against NaN evaluates to False.
+
+        Args:
+            age: Player ages
+            natural_fitness: Natural Fitness attributes (0-20)
+            stamina: Stamina attributes (0-20)
+            injury_proneness: Injury Proneness attributes (0-20), optional
+
+        Returns:
+            Array of adjusted fatigue thresholds (200-550)
+        """
+        age = np.asarray(age, dtype=float)
+        natural_fitness = np.asarray(natural_fitness, dtype=float)
+        stamina = np.asarray(stamina, dtype=float)
+
+        # Age sets the base threshold (first matching rule wins)
+        threshold = np.select([age >= 32, age >= 30, age < 19], [300.0, 350.0, 350.0], default=400.0)
+
+        threshold += np.where(natural_fitness < 10, -50.0, np.where(natural_fitness >= 15, 50.0, 0.0))
+        threshold += np.where(stamina < 10, -50.0, np.where(stamina >= 15, 30.0, 0.0))
+
+        if injury_proneness is not None:
+            injury_proneness = np.asarray(injury_proneness, dtype=float)
+            threshold += np.where(injury_proneness >= 15, -100.0,
+                                  np.where(injury_proneness <= 8, 50.0, 0.0))
+
+        return np.clip(threshold, 200.0, 550.0)
 
     def _get_position_fatigue_multiplier(self, position_name: str) -> float:
         """
@@ -1554,7 +1643,8 @@ class MatchReadySelector:
         except (ValueError, AttributeError) as e:
             raise ValueError(f"Invalid date format '{month_day_str}'. Expected MM-DD format.")
 
-    def _identify_players_to_rest(self, upcoming_matches: List = None) -> List[str]:
+    def _identify_players_to_rest(self, upcoming_matches: List = None,
+                                  matches_until_high_priority: Optional[int] = None) -> List[str]:
         """
         Identify players who should be rested.
 
@@ -1566,6 +1656,8 @@ class MatchReadySelector:
         Args:
             upcoming_matches: List of upcoming match dicts with 'importance' key for lookahead
                               (used for proactive rotation planning)
+            matches_until_high_priority: Precomputed distance to the next High match
+                                         (1 = next match); skips scanning upcoming_matches
 
         Returns:
             List of player names to rest
@@ -1594,29 +1686,33 @@ class MatchReadySelector:
                 rest_candidates.append(row['Name'])
 
         # 2. PROACTIVE ROTATION: Rest players approaching threshold before high priority matches
-        if upcoming_matches:
+        if matches_until_high_priority is None and upcoming_matches:
             # Find the next high priority match
-            matches_until_high_priority = None
             for i, match in enumerate(upcoming_matches):
                 importance = match.get('importance', 'Medium')
                 if importance == 'High':
                     matches_until_high_priority = i + 1  # +1 because index 0 = next match
                     break
 
-            # If high priority match is coming and not the immediate next match
-            if matches_until_high_priority is not None and matches_until_high_priority > 1:
-                for player_name, consecutive in self.player_match_count.items():
-                    if player_name in rest_candidates:
-                        continue  # Already being rested
-
-                    # Get position-specific rotation threshold
-                    threshold = self._get_rotation_threshold_for_player(player_name)
-
-                    # If player would hit threshold by the high priority match, rest them now
-                    # This resets their consecutive count so they're fresh for the big game
-                    projected_consecutive = consecutive + matches_until_high_priority
-                    if projected_consecutive >= threshold:
-                        rest_candidates.append(player_name)
+        # If high priority match is coming and not the immediate next match
+        if matches_until_high_priority is not None and matches_until_high_priority > 1:
+            already_resting = set(rest_candidates)
+            for player_name, consecutive in self.player_match_count.items():
+                if player_name in already_resting:
+                    continue  # Already being rested
+
+                # If player would hit threshold by the high priority match, rest them now
+                # This resets their consecutive count so they're fresh for the big game
+                projected_consecutive = consecutive + matches_until_high_priority
+
+                # Cheap bounds first: every position-specific threshold lies in
+                # [ROTATION_THRESHOLD_MIN, ROTATION_THRESHOLD_MAX], so the lookup (a squad
+                # scan) is only needed when the projection falls inside that band
+                if projected_consecutive < ROTATION_THRESHOLD_MIN:
+                    continue
+                if (projected_consecutive >= ROTATION_THRESHOLD_MAX or
+                        projected_consecutive >= self._get_rotation_threshold_for_player(player_name)):
+                    rest_candidates.append(player_name)
 
         return rest_candidates
 
@@ -1635,6 +1731,17 @@ class MatchReadySelector:
         Returns:
             Threshold where rotation penalties start (lower = needs more frequent rest)
         """
+        # Positions never change during a run, so only scan the squad once per player
+        threshold = self._rotation_threshold_cache.get(player_name)
+        if threshold is None:
+            threshold = self._rotation_threshold_cache[player_name] = \
+                self._calculate_rotation_threshold_for_player(player_name)
+        return threshold
+
+    def _calculate_rotation_threshold_for_player(self, player_name: str) -> int:
+        """
+        Uncached body of _get_rotation_threshold_for_player.
+        """
         player = self.df[self.df['Name_Normalized'] == normalize_name(player_name)]
         if player.empty:
             return 4  # Default threshold
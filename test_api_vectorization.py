@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Checks for the vectorized UI API helpers.
+
+Batched paths are pinned to hand-computed results on small frames; cached
+paths must produce exactly what a fresh computation produces on the real
+squad data.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ui', 'api'))
+
+from api_match_selector import ApiMatchReadySelector
+from api_rotation_selector import ApiRotationSelector
+from api_player_removal import PlayerRemovalAdvisor
+
+PLAYERS_CSV = 'players-current.csv'
+
+
+def test_fatigue_threshold_vec_matches_scalar():
+    """Vectorized fatigue thresholds equal the scalar thresholds, NaNs included."""
+    selector = ApiMatchReadySelector(PLAYERS_CSV, PLAYERS_CSV)
+
+    ages = np.array([17, 18, 19, 25, 30, 31, 32, 36, np.nan])
+    fitness = np.array([5, 9, 10, 14, 15, 20, np.nan, 12, 16])
+    stamina = np.array([np.nan, 9, 10, 14, 15, 20, 3, 12, 16])
+    proneness = np.array([8, 9, 15, 20, np.nan, 1, 14, 8, 16])
+
+    vec = selector._get_adjusted_fatigue_threshold_vec(ages, fitness, stamina, proneness)
+    scalar = [selector._get_adjusted_fatigue_threshold(a, f, s, p)
+              for a, f, s, p in zip(ages, fitness, stamina, proneness)]
+    assert vec.tolist() == scalar
+
+    vec_no_ip = selector._get_adjusted_fatigue_threshold_vec(ages, fitness, stamina)
+    scalar_no_ip = [selector._get_adjusted_fatigue_threshold(a, f, s, None)
+                    for a, f, s in zip(ages, fitness, stamina)]
+    assert vec_no_ip.tolist() == scalar_no_ip
+
+
+def test_cached_status_flags_match_uncached():
+    """Flags served from the per-plan cache equal freshly computed flags."""
+    selector = ApiMatchReadySelector(PLAYERS_CSV, PLAYERS_CSV)
+    # Two players sharing a name must still get their own cached flags
+    selector.df.loc[selector.df.index[1], 'Name'] = selector.df['Name'].iloc[0]
+    selector.df.loc[selector.df.index[0], 'Fatigue'] = 1000
+    selector.df.loc[selector.df.index[1], 'Fatigue'] = 0
+    selector.player_match_count = {name: i % 5 for i, name in enumerate(selector.df['Name'])}
+    rows = list(selector.df.iterrows())
+
+    uncached = [selector._get_player_status_flags_ui(row) for _, row in rows]
+    selector._flag_cache = dict(zip(selector.df.index, selector._compute_static_status_flags(selector.df)))
+    cached = [selector._get_player_status_flags_ui(row, label) for label, row in rows]
+    assert cached == uncached
+    assert cached[0] != cached[1]
+
+
+def test_ideal_rating_vec_expected_values():
+    """Ideal ratings apply the familiarity penalty, Versatility and the below-12 penalty."""
+    selector = ApiRotationSelector(PLAYERS_CSV)
+    df = pd.DataFrame({
+        'Skill': [20, 12, 8, np.nan, 0.5],
+        'Ability': [150, 0, 100, 120, 90],
+        'Versatility': [10, 20, np.nan, 10, 10],
+    })
+
+    ratings = selector.calculate_ideal_effective_rating_vec(df, 'Skill', 'Ability')
+    expected = [
+        150.0,                         # Natural: no penalty
+        12 * 5.0 * (1 - 0.10 * 0.5),   # No ability -> skill * 5; Versatility 20 halves the 10% penalty
+        100 * (1 - 0.45) * 0.30,       # Awkward (45%), missing Versatility, below 12 -> 70% cut
+        -999.0,                        # Missing familiarity
+        -999.0,                        # Familiarity below 1
+    ]
+    np.testing.assert_allclose(ratings, expected)
+
+
+def test_shared_cost_matrix_matches_rebuilt():
+    """Selecting from rows of the whole-squad cost matrix equals rebuilding it."""
+    selector = ApiRotationSelector(PLAYERS_CSV)
+    cost_matrix = selector._build_ideal_cost_matrix(selector.df)
+    excluded = set(selector.df['Name'][::3])
+
+    def picks(xi):
+        return {pos: (name, rating) for pos, (name, rating, _) in xi.items()}
+
+    assert picks(selector.select_ideal_xi(cost_matrix=cost_matrix)) == picks(selector.select_ideal_xi())
+    assert (picks(selector.select_ideal_xi(exclude_players=excluded, cost_matrix=cost_matrix))
+            == picks(selector.select_ideal_xi(exclude_players=excluded)))
+
+
+def test_pure_ability_rating_vec_expected_values():
+    """Without an ability column the hierarchy rating scales familiarity by 5."""
+    selector = ApiMatchReadySelector(PLAYERS_CSV, PLAYERS_CSV)
+    df = pd.DataFrame({'Skill': [20, 15, 11, np.nan], 'Versatility': [10, 1, 10, 10]})
+
+    ratings = selector._calculate_pure_ability_rating_vec(df, 'Skill')
+    expected = [
+        20 * 5.0,                        # Natural: no penalty
+        15 * 5.0 * (1 - 0.01 * 1.25),    # Accomplished (1%); Versatility 1 raises it by 25%
+        11 * 5.0 * (1 - 0.25) * 0.30,    # Unconvincing (25%), below 12 -> 70% cut
+        -999.0,                          # Missing familiarity
+    ]
+    np.testing.assert_allclose(ratings, expected)
+
+    # A position column missing from the data means nobody can play there
+    np.testing.assert_allclose(selector._calculate_pure_ability_rating_vec(df, 'Other'), [-999.0] * 4)
+
+
+def test_best_position_skill_columns_expected_values():
+    """Listed positions win, ties go to the earlier listing or column, NaNs never win."""
+    advisor = PlayerRemovalAdvisor(PLAYERS_CSV)
+    cases = [
+        # (Positions, skills, expected best column)
+        ('AM (R), AM (L)', {'AM(R)': 14, 'AM(L)': 16, 'Striker': 19}, 'AM(L)'),
+        ('AM (L),AM (R)', {'AM(L)': 15, 'AM(R)': 15}, 'AM(L)'),
+        ('AM (R),AM (L)', {'AM(L)': 15, 'AM(R)': 15}, 'AM(R)'),
+        ('DM, M (C)', {'DM(L)': 10, 'AM(C)': 13}, 'AM(C)'),
+        ('ST (C)', {'Striker': np.nan, 'GK': 5}, 'GK'),
+        ('Unknown', {'D(C)': 12, 'Striker': 12}, 'D(C)'),
+        (None, {'D(R/L)': 7}, 'D(R/L)'),
+        (None, {'GK': np.nan}, None),
+    ]
+    rows = []
+    for positions, skills, _ in cases:
+        row = dict.fromkeys(advisor.SKILL_COLUMNS, 0.0)
+        row.update(skills, Positions=positions)
+        rows.append(row)
+    advisor.df = pd.DataFrame(rows)
+
+    assert advisor._get_best_position_skill_columns() == [expected for _, _, expected in cases]
+
+
+def test_termination_costs_expected_values():
+    """Remaining wages for owned contracts; loanees, non-contract and expired cost nothing."""
+    advisor = PlayerRemovalAdvisor(PLAYERS_CSV)
+    df = pd.DataFrame({
+        'Wages_Numeric': [1000.0, 1000.0, 1000.0, 1000.0, 1000.0],
+        'Months Left (Contract)': [10, 10, 10, -1, np.nan],
+        'Contract Type': ['1', '4', '1', '1', '1'],
+        'LoanStatus': ['Own', 'Own', 'LoanedIn', 'Own', 'Own'],
+    })
+
+    release, mutual = advisor._calculate_termination_costs(df)
+    np.testing.assert_allclose(release, [1000 * 4.33 * 10, 0, 0, 0, 0])
+    np.testing.assert_allclose(mutual, release * 0.55)
+
+
+def test_removal_priorities_expected_values():
+    """Scores, bands, actions and reasons for a kept starter, a release and a loanee."""
+    advisor = PlayerRemovalAdvisor(PLAYERS_CSV)
+    steady = {'Consistency': 15, 'Important Matches': 15, 'Injury Proneness': 5, 'Ambition': 15,
+              'Professional': 15, 'Controversy': 5, 'Temperament': 15, 'Determination': 15,
+              'Natural Fitness': 15}
+    batch = pd.DataFrame([
+        {**steady, 'Name': 'Starter', 'CA': 100, 'PA': 100, 'Age': 26, 'Wages_Numeric': 100.0,
+         'Months Left (Contract)': 24, 'Asking_Price_Numeric': 0.0, 'Contract Type': '1', 'LoanStatus': 'Own'},
+        {**steady, 'Name': 'Veteran', 'CA': 70, 'PA': 70, 'Age': 33, 'Wages_Numeric': 0.0,
+         'Months Left (Contract)': 0, 'Asking_Price_Numeric': 0.0, 'Contract Type': '4', 'LoanStatus': 'Own',
+         'Consistency': 7, 'Professional': 10, 'Determination': 10},
+        {**steady, 'Name': 'Loanee', 'CA': 90, 'PA': 120, 'Age': 22, 'Wages_Numeric': 200.0,
+         'Months Left (Contract)': 6, 'Asking_Price_Numeric': 0.0, 'Contract Type': '1', 'LoanStatus': 'LoanedIn',
+         'Important Matches': 7},
+    ])
+
+    results = advisor._classify_removal_priorities(
+        batch, batch.to_dict('records'), ['D(C)', 'Striker', 'AM(C)'], [3, 3, 1], [10, 4, 5],
+        100, [0.0, 0.0, 0.0], [1, 3, 2], [{'DC1': 1}, {}, {'AMC': 2}]
+    )
+    summary = [(r['priority'], r['priority_score'], r['action'], r['reasons'], r['is_loaned_in']) for r in results]
+
+    assert summary == [
+        ('Low', -40, 'Keep - squad member', ['🏆 Starting XI player at: DC1'], False),
+        ('Critical', 160, 'Release immediately (no cost)', [
+            'Non-contract player - can be released freely',
+            'Bottom 25% at position (rank #3)',
+            '⚠️ Not in Starting XI or Second XI at any position',
+            'CA (70) significantly below squad average (100)',
+            'Critical: Low consistency (7) - unreliable performer',
+            'Veteran with limited development potential',
+            'Age 33 - approaching career end',
+        ], False),
+        # Loanees are scored on the loan rules only
+        ('Keep', 10, 'Keep until loan expires', [
+            '📋 Second XI quality at: AMC',
+            'CA (90) below squad average (100)',
+            'Low big match performance (7)',
+        ], True),
+    ]
+
+
+def test_removal_cache_matches_fresh_load():
+    """A cached advisor gives the same recommendations, and a changed CSV is reloaded."""
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'players.csv')
+        shutil.copy(PLAYERS_CSV, csv_path)
+
+        fresh = PlayerRemovalAdvisor(csv_path).get_removal_recommendations()
+        assert os.path.exists(csv_path + PlayerRemovalAdvisor.CACHE_SUFFIX)
+        cached_advisor = PlayerRemovalAdvisor(csv_path)
+        assert cached_advisor.match_selector is None
+        assert cached_advisor.get_removal_recommendations() == fresh
+
+        # Dropping a player changes the CSV, so the cache must not be reused
+        with open(csv_path, encoding='utf-8-sig') as f:
+            lines = f.readlines()
+        with open(csv_path, 'w', encoding='utf-8') as f:
+            f.writelines(lines[:-1])
+        reloaded = PlayerRemovalAdvisor(csv_path)
+        assert reloaded.match_selector is not None
+        assert len(reloaded.df) == len(lines) - 2
+
+
+if __name__ == '__main__':
+    test_fatigue_threshold_vec_matches_scalar()
+    test_cached_status_flags_match_uncached()
+    test_ideal_rating_vec_expected_values()
+    test_shared_cost_matrix_matches_rebuilt()
+    test_pure_ability_rating_vec_expected_values()
+    test_best_position_skill_columns_expected_values()
+    test_termination_costs_expected_values()
+    test_removal_priorities_expected_values()
+    test_removal_cache_matches_fresh_load()
+    print("ALL VECTORIZATION CHECKS PASSED")
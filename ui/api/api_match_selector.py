@@ -1,7 +1,6 @@
 import sys
 import os
 import json
-import contextlib
 import pandas as pd
 import numpy as np
 from datetime import datetime
@@ -11,20 +10,24 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'
 
 from fm_match_ready_selector import MatchReadySelector, normalize_name
 import data_manager
+from api_utils import suppress_stdout, write_json
 
-@contextlib.contextmanager
-def suppress_stdout():
-    """Context manager to suppress stdout during initialization of parent class."""
-    with open(os.devnull, 'w') as devnull:
-        old_stdout = sys.stdout
-        sys.stdout = devnull
-        try:
-            yield
-        finally:
-            sys.stdout = old_stdout
 
 CONFIRMED_LINEUPS_PATH = os.path.join(os.path.dirname(__file__), '../data/confirmed_lineups.json')
 
+# Status flag thresholds shared by the per-player and squad-wide flag paths
+SHARPNESS_SCALE = 10000         # Match Sharpness is stored as 0-10000
+NEED_VACATION_MARGIN = 100      # Fatigue this far past the personal threshold needs a vacation
+LOW_CONDITION = 0.80
+LOW_SHARPNESS = 0.80
+PEAK_SHARPNESS = 0.95
+PEAK_CONDITION = 0.90
+PEAK_MAX_FATIGUE = 200
+VETERAN_AGE = 32
+ROTATION_RISK_MATCHES = 3       # Consecutive matches before flagging rotation risk
+LOW_ATTRIBUTE = 10              # Stamina / Natural Fitness below this are flagged
+INJURY_PRONE_ATTRIBUTE = 15
+
 class ApiMatchReadySelector(MatchReadySelector):
     """
     Wrapper around MatchReadySelector to adapt it for the UI API.
@@ -125,6 +128,9 @@ class ApiMatchReadySelector(MatchReadySelector):
                 else:
                     new_formation.append(pos)
             self.formation = new_formation
+
+        # Static status flags per df index label, filled in by generate_plan
+        self._flag_cache = {}
             
     def calculate_effective_rating(self, row: pd.Series, skill_col: str, ability_col: str = None,
                                    match_importance: str = 'Medium',
@@ -181,20 +187,45 @@ class ApiMatchReadySelector(MatchReadySelector):
         # This enables rotation penalties to account for matches played before this simulation
         self.player_match_count = self._load_consecutive_counts_from_history(current_date)
 
+        # Status inputs (fatigue, condition, attributes) don't change during the plan,
+        # so compute the static flags for the whole squad once up front. Keyed by index
+        # label rather than Name so players sharing a name keep their own flags
+        self._flag_cache = dict(zip(self.df.index, self._compute_static_status_flags(self.df)))
+
+        # Row position per normalized name (first occurrence wins, like iloc[0] on a mask)
+        # so manual overrides don't rescan the whole squad for every override
+        row_position_by_name = {}
+        for position, name_normalized in enumerate(self.df['Name_Normalized']):
+            row_position_by_name.setdefault(name_normalized, position)
+
         # For rotation logic, we might need to auto-rest players
         auto_rested_players = []
 
+        # Columnar view of the schedule, read once instead of re-hashing each match dict
+        match_ids = [match.get('id', str(i)) for i, match in enumerate(matches_data)]
+        importances = np.array([match.get('importance', 'Medium') for match in matches_data], dtype=object)
+        match_dates = [match.get('date') for match in matches_data]
+
+        # Distance from each match to the next High match (None if there isn't one),
+        # so the lookahead below doesn't rescan the remaining schedule every match
+        high_positions = np.flatnonzero(importances == 'High')
+        next_high = np.searchsorted(high_positions, np.arange(len(matches_data)), side='right')
+        matches_until_high_by_match = [
+            int(high_positions[k]) - i if k < len(high_positions) else None
+            for i, k in enumerate(next_high)
+        ]
+
         # Default empty dict for manual overrides
         if manual_overrides_map is None:
             manual_overrides_map = {}
 
         for i, match in enumerate(matches_data):
             # Get unique match ID for rejection/override lookups
-            match_id = match.get('id', str(i))
+            match_id = match_ids[i]
 
-            importance = match.get('importance', 'Medium')
+            importance = importances[i]
             prioritize_sharpness = (importance in ['Low', 'Sharpness'])
-            match_date_str = match.get('date')
+            match_date_str = match_dates[i]
 
             # Get manual overrides for this match (from match data or from map by match ID)
             match_overrides = match.get('manualOverrides', {}) or manual_overrides_map.get(match_id, {})
@@ -219,9 +250,11 @@ class ApiMatchReadySelector(MatchReadySelector):
             # Apply manual overrides - replace calculated selections with manual choices
             for pos, player_name in match_overrides.items():
                 # Find player data for the overridden player (use Name_Normalized for Unicode-safe comparison)
-                player_row = self.df[self.df['Name_Normalized'] == normalize_name(player_name)]
-                if not player_row.empty:
-                    player_data = player_row.iloc[0].to_dict()
+                row_position = row_position_by_name.get(normalize_name(player_name))
+                if row_position is not None:
+                    player_data = self.df.iloc[row_position].to_dict()
+                    # Same original-index field select_match_xi rows carry
+                    player_data['index'] = self.df.index[row_position]
                     # Use a dummy rating for manual selections (we don't recalculate)
                     selection_raw[pos] = (player_name, 0.0, player_data)
             
@@ -232,15 +265,21 @@ class ApiMatchReadySelector(MatchReadySelector):
                 raw_condition = player_data.get('Condition', 100)
                 normalized_condition = raw_condition / 10000.0 if raw_condition > 100 else raw_condition / 100.0
 
+                # Reuse the Name_Normalized column built at load time instead of
+                # re-running unidecode for every selected player on every match
+                name_normalized = player_data.get('Name_Normalized')
+                if not name_normalized:
+                    name_normalized = normalize_name(name)
+
                 selection_formatted[pos] = {
                     "name": name,
-                    "nameNormalized": normalize_name(name),  # For frontend to use when storing rejections
+                    "nameNormalized": name_normalized,  # For frontend to use when storing rejections
                     "rating": rating,
                     "condition": normalized_condition,
                     "fatigue": player_data.get('Fatigue', 0),
-                    "sharpness": player_data.get('Match Sharpness', 10000) / 10000,
+                    "sharpness": player_data.get('Match Sharpness', SHARPNESS_SCALE) / SHARPNESS_SCALE,
                     "age": player_data.get('Age', 25),
-                    "status": self._get_player_status_flags_ui(player_data)
+                    "status": self._get_player_status_flags_ui(player_data, player_data.get('index'))
                 }
             
             results.append({
@@ -260,25 +299,38 @@ class ApiMatchReadySelector(MatchReadySelector):
             auto_rested_players = [] # Reset for next iteration
 
             if i < len(matches_data) - 1:
-                upcoming_matches = matches_data[i+1:]  # All future matches for lookahead
-
-                # Pass upcoming matches to enable proactive rotation planning
-                # This allows resting players who would hit rotation threshold by high priority match
-                auto_rested_players = self._identify_players_to_rest(upcoming_matches=upcoming_matches)
+                # Distance to the next high priority match (1 = next match) enables proactive
+                # rotation planning: rest players who would hit rotation threshold by then
+                auto_rested_players = self._identify_players_to_rest(
+                    matches_until_high_priority=matches_until_high_by_match[i]
+                )
                         
         return results
 
-    def _get_player_status_flags_ui(self, player):
+    def _get_player_status_flags_ui(self, player, row_label=None):
         """
         Generate status flags for the UI, matching logic in _print_match_selection.
+
+        Uses the per-plan cache built by generate_plan when the player's df index
+        label is given; only the Rotation Risk flag is re-evaluated since match
+        counts change every match.
         """
+        cached = self._flag_cache.get(row_label) if row_label is not None else None
+        if cached is not None:
+            before_rotation, after_rotation = cached
+            flags = list(before_rotation)
+            if self.player_match_count.get(player['Name'], 0) >= ROTATION_RISK_MATCHES:
+                flags.append("Rotation Risk")
+            flags.extend(after_rotation)
+            return flags
+
         flags = []
         fatigue = player.get('Fatigue', 0)
         
         condition = player.get('Condition', 100)
         if condition > 100: condition /= 100
         
-        sharpness = player.get('Match Sharpness', 10000) / 10000
+        sharpness = player.get('Match Sharpness', SHARPNESS_SCALE) / SHARPNESS_SCALE
         age = player.get('Age', 25)
         stamina = player.get('Stamina', 15)
         natural_fitness = player.get('Natural Fitness', 15)
@@ -288,39 +340,41 @@ class ApiMatchReadySelector(MatchReadySelector):
         threshold = self._get_adjusted_fatigue_threshold(age, natural_fitness, stamina, injury_proneness)
         
         # Status mapping
-        if fatigue >= threshold + 100:
+        if fatigue >= threshold + NEED_VACATION_MARGIN:
             flags.append("Need Vacation")
         elif fatigue >= threshold:
             flags.append("Fatigued")
             
-        if condition < 0.80:
+        if condition < LOW_CONDITION:
             flags.append("Low Condition")
             
-        if sharpness < 0.80:
+        if sharpness < LOW_SHARPNESS:
             flags.append("Low Sharpness")
             
         # Peak form logic
-        if sharpness >= 0.95 and condition >= 0.90 and fatigue < 200:
+        if sharpness >= PEAK_SHARPNESS and condition >= PEAK_CONDITION and fatigue < PEAK_MAX_FATIGUE:
             flags.append("Peak Form")
         
-        if pd.notna(age) and age >= 32:
+        # Attributes are numeric (NaN when missing) and NaN never satisfies a
+        # comparison, so no pd.notna() guards are needed before these checks
+        if age >= VETERAN_AGE:
             flags.append("Veteran Risk")
         
         # Check consecutive matches
         name = player['Name']
         if name in self.player_match_count:
             consecutive = self.player_match_count[name]
-            if consecutive >= 3:
+            if consecutive >= ROTATION_RISK_MATCHES:
                 flags.append("Rotation Risk") # Replaced "Overplayed"
                 
-        if pd.notna(stamina) and stamina < 10:
+        if stamina < LOW_ATTRIBUTE:
             flags.append("Low Stamina")
             
-        if pd.notna(natural_fitness) and natural_fitness < 10:
+        if natural_fitness < LOW_ATTRIBUTE:
             flags.append("Low Fitness")
 
-        if pd.notna(injury_proneness) and injury_proneness >= 15:
-             flags.append("Injury Prone")
+        if injury_proneness >= INJURY_PRONE_ATTRIBUTE:
+            flags.append("Injury Prone")
             
         # Loan Status
         if player.get('LoanStatus') == 'LoanedIn':
@@ -328,21 +382,65 @@ class ApiMatchReadySelector(MatchReadySelector):
             
         return flags
 
-# --- Custom JSON Encoder to handle numpy types ---
-class NumpyEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, (np.int_, np.intc, np.intp, np.int8,
-                            np.int16, np.int32, np.int64, np.uint8,
-                            np.uint16, np.uint32, np.uint64)):
-            return int(obj)
-        elif isinstance(obj, (np.float_, np.float16, np.float32, 
-                              np.float64)):
-            return float(obj)
-        elif isinstance(obj, (np.ndarray,)):
-            return obj.tolist()
-        elif isinstance(obj, (np.bool_)):
-            return bool(obj)
-        return json.JSONEncoder.default(self, obj)
+    def _compute_static_status_flags(self, df):
+        """
+        Vectorized status flags that stay fixed for the whole plan.
+
+        Every rule is evaluated as a boolean mask over the squad, so the only
+        per-player Python work left is assembling the label tuples. Rotation Risk
+        is left out because it depends on match counts that change every match.
+
+        Returns:
+            pd.Series of (flags_before_rotation, flags_after_rotation) tuples
+            aligned with df.index, so Rotation Risk can be slotted back in order
+        """
+        n = len(df)
+
+        def column(name, default):
+            if name in df.columns:
+                return df[name].to_numpy(dtype=float)
+            return np.full(n, default, dtype=float)
+
+        def assemble(rules):
+            labels = [label for label, _ in rules]
+            masks = np.column_stack([mask for _, mask in rules]) if n else np.zeros((0, len(rules)), dtype=bool)
+            return [tuple(label for label, hit in zip(labels, row) if hit) for row in masks.tolist()]
+
+        fatigue = column('Fatigue', 0)
+        condition = column('Condition', 100)
+        condition = np.where(condition > 100, condition / 100, condition)
+        sharpness = column('Match Sharpness', SHARPNESS_SCALE) / SHARPNESS_SCALE
+        age = column('Age', 25)
+        stamina = column('Stamina', 15)
+        natural_fitness = column('Natural Fitness', 15)
+        injury_proneness = column('Injury Proneness', 10)
+
+        # Calculate personalized fatigue thresholds
+        threshold = self._get_adjusted_fatigue_threshold_vec(age, natural_fitness, stamina, injury_proneness)
+
+        if 'LoanStatus' in df.columns:
+            loaned_in = (df['LoanStatus'] == 'LoanedIn').to_numpy()
+        else:
+            loaned_in = np.zeros(n, dtype=bool)
+
+        # NaN never satisfies a comparison, which matches the scalar pd.notna() guards
+        need_vacation = fatigue >= threshold + NEED_VACATION_MARGIN
+        before_rotation = assemble((
+            ("Need Vacation", need_vacation),
+            ("Fatigued", (fatigue >= threshold) & ~need_vacation),
+            ("Low Condition", condition < LOW_CONDITION),
+            ("Low Sharpness", sharpness < LOW_SHARPNESS),
+            ("Peak Form", (sharpness >= PEAK_SHARPNESS) & (condition >= PEAK_CONDITION) & (fatigue < PEAK_MAX_FATIGUE)),
+            ("Veteran Risk", age >= VETERAN_AGE),
+        ))
+        after_rotation = assemble((
+            ("Low Stamina", stamina < LOW_ATTRIBUTE),
+            ("Low Fitness", natural_fitness < LOW_ATTRIBUTE),
+            ("Injury Prone", injury_proneness >= INJURY_PRONE_ATTRIBUTE),
+            ("Loaned In", loaned_in),
+        ))
+
+        return pd.Series(list(zip(before_rotation, after_rotation)), index=df.index, dtype=object)
 
 def main():
     try:
@@ -372,7 +470,7 @@ def main():
         
         plan = selector.generate_plan(matches, rejected)
         
-        print(json.dumps({"success": True, "plan": plan}, cls=NumpyEncoder))
+        write_json({"success": True, "plan": plan})
         
     except Exception as e:
         print(json.dumps({"success": False, "error": str(e)}))
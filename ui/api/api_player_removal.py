@@ -1,27 +1,20 @@
 import sys
 import os
 import json
-import contextlib
+import pickle
+import tempfile
 import pandas as pd
 import numpy as np
-import re
+
+# Characters dropped from currency strings like '$1,234' before numeric parsing
+_CURRENCY_STRIP = str.maketrans('', '', '$,')
 
 # Add root directory to sys.path to allow importing from root scripts
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 
 import data_manager
 from fm_match_ready_selector import MatchReadySelector
-
-@contextlib.contextmanager
-def suppress_stdout():
-    """Context manager to suppress stdout during initialization."""
-    with open(os.devnull, 'w') as devnull:
-        old_stdout = sys.stdout
-        sys.stdout = devnull
-        try:
-            yield
-        finally:
-            sys.stdout = old_stdout
+from api_utils import suppress_stdout, write_json
 
 
 class PlayerRemovalAdvisor:
@@ -43,6 +36,44 @@ class PlayerRemovalAdvisor:
         'ATT': ['Striker', 'AM(L)', 'AM(R)', 'AM(C)']
     }
 
+    # Positional skill columns, in fallback order for best-skill selection
+    SKILL_COLUMNS = ['GK', 'D(C)', 'D(R/L)', 'DM(L)', 'DM(R)', 'AM(L)', 'AM(C)', 'AM(R)', 'Striker']
+
+    # Skill column -> role for position-specific thresholds (anything else is 'general')
+    POSITION_ROLES = {
+        'GK': 'goalkeeper',
+        'D(C)': 'defender',
+        'D(R/L)': 'defender',
+        'DM(L)': 'playmaker',
+        'DM(R)': 'playmaker',
+        'AM(C)': 'playmaker',
+        'AM(L)': 'attacker',
+        'AM(R)': 'attacker',
+        'Striker': 'attacker',
+    }
+
+    # Priority score bands (ascending lower bounds) and their labels, lowest band first
+    OWNED_PRIORITY_THRESHOLDS = np.array([30, 50, 80])
+    OWNED_PRIORITY_LABELS = np.array(['Low', 'Medium', 'High', 'Critical'])
+    LOAN_PRIORITY_THRESHOLDS = np.array([25, 50])
+    LOAN_PRIORITY_LABELS = np.array(['Keep', 'Monitor', 'End Early'])
+
+    # Numeric columns (including hidden attributes from retention strategy research)
+    NUMERIC_COLUMNS = ['CA', 'PA', 'Age', 'Consistency', 'Important Matches',
+                       'Injury Proneness', 'Adaptability', 'Ambition', 'Loyalty',
+                       'Professional', 'Controversy', 'Temperament', 'Determination',
+                       'Natural Fitness', 'Pressure',  # Added for retention strategy analysis
+                       'GK', 'D(C)', 'D(R/L)', 'DM(L)', 'DM(R)',
+                       'AM(L)', 'AM(C)', 'AM(R)', 'Striker', 'Months Left (Contract)']
+
+    # Other columns the advisor reads from the CSV; everything else is skipped on load
+    TEXT_COLUMNS = ['Name', 'Positions', 'Wages', 'Asking Price', 'Contract Type', 'LoanStatus']
+
+    # Preprocessed DataFrame and hierarchy are cached next to the CSV.
+    # Bump CACHE_VERSION whenever the preprocessing changes.
+    CACHE_SUFFIX = '.cache.pkl'
+    CACHE_VERSION = 3
+
     # Map positions from player data to skill columns
     POSITION_TO_SKILL = {
         'GK': 'GK',
@@ -67,35 +98,70 @@ class PlayerRemovalAdvisor:
     }
 
     def __init__(self, csv_filepath):
-        """Load player data from CSV."""
-        self.df = pd.read_csv(csv_filepath)
+        """Load player data from CSV, reusing the preprocessed cache while the CSV is unchanged."""
+        cache_path = csv_filepath + self.CACHE_SUFFIX
+        cache_key = self._get_cache_key(csv_filepath)
+        cached = self._load_cache(cache_path, cache_key)
+
+        if cached is not None:
+            self.df = cached['df']
+            self.player_hierarchy = cached['player_hierarchy']
+            self.match_selector = None
+        else:
+            self._load_and_preprocess(csv_filepath)
+            self._init_hierarchy(csv_filepath)
+            # A failed hierarchy is not cached so the next run retries it
+            if self.player_hierarchy:
+                self._save_cache(cache_path, cache_key)
 
-        # Ensure numeric columns (including new hidden attributes from retention strategy research)
-        numeric_cols = ['CA', 'PA', 'Age', 'Consistency', 'Important Matches',
-                       'Injury Proneness', 'Adaptability', 'Ambition', 'Loyalty',
-                       'Professional', 'Controversy', 'Temperament', 'Determination',
-                       'Natural Fitness', 'Pressure',  # Added for retention strategy analysis
-                       'GK', 'D(C)', 'D(R/L)', 'DM(L)', 'DM(R)',
-                       'AM(L)', 'AM(C)', 'AM(R)', 'Striker', 'Months Left (Contract)']
+        # Skill columns present in this CSV, checked once instead of per player
+        self._available_skill_cols = [col for col in self.SKILL_COLUMNS if col in self.df.columns]
 
-        for col in numeric_cols:
-            if col in self.df.columns:
-                self.df[col] = pd.to_numeric(self.df[col], errors='coerce')
+        # Cache of skill column -> {player name: rank}, filled by _get_position_rank
+        self._position_rank_cache = {}
+
+        # Player name -> {position: tier}, inverted once from the per-position hierarchy
+        self._tier_by_name = self._invert_player_hierarchy()
+
+    def _load_and_preprocess(self, csv_filepath):
+        """Read the CSV and coerce numeric, currency and status columns."""
+        # Only the columns the advisor reads are parsed
+        loaded_cols = set(self.NUMERIC_COLUMNS) | set(self.TEXT_COLUMNS)
+        self.df = pd.read_csv(csv_filepath, usecols=lambda col: col in loaded_cols)
+
+        present_cols = [col for col in self.NUMERIC_COLUMNS if col in self.df.columns]
+
+        # read_csv already types clean columns; only re-parse ones inferred as text
+        text_cols = [col for col in present_cols if not pd.api.types.is_numeric_dtype(self.df[col])]
+        if text_cols:
+            self.df[text_cols] = self.df[text_cols].apply(pd.to_numeric, errors='coerce')
+
+        # Whole-number columns (CA/PA up to 200, 1-20 attributes, months left)
+        # fit in int8/int16; columns with NaNs or fractional skills stay float64
+        int_cols = [col for col in present_cols if pd.api.types.is_integer_dtype(self.df[col])]
+        if int_cols:
+            self.df[int_cols] = self.df[int_cols].apply(pd.to_numeric, downcast='integer')
 
         # Parse wage strings to numeric (remove $ and , and convert)
         if 'Wages' in self.df.columns:
-            self.df['Wages_Numeric'] = self.df['Wages'].apply(self._parse_currency)
+            self.df['Wages_Numeric'] = self._parse_currency(self.df['Wages'])
         else:
             self.df['Wages_Numeric'] = 0
 
         # Parse asking price similarly
         if 'Asking Price' in self.df.columns:
-            self.df['Asking_Price_Numeric'] = self.df['Asking Price'].apply(self._parse_currency)
+            self.df['Asking_Price_Numeric'] = self._parse_currency(self.df['Asking Price'])
         else:
             self.df['Asking_Price_Numeric'] = 0
 
-        # Initialize match selector for hierarchy-based analysis
-        # This provides Starting XI / Second XI rankings per position
+        # Status columns are compared against literals on every pass, and position
+        # strings repeat across the squad, so they are stored as categories
+        for col in ['LoanStatus', 'Contract Type', 'Positions']:
+            if col in self.df.columns:
+                self.df[col] = self.df[col].astype('category')
+
+    def _init_hierarchy(self, csv_filepath):
+        """Build Starting XI / Second XI rankings per position via the match selector."""
         try:
             with suppress_stdout():
                 self.match_selector = MatchReadySelector(csv_filepath, csv_filepath)
@@ -105,6 +171,42 @@ class PlayerRemovalAdvisor:
             self.match_selector = None
             self.player_hierarchy = {}
 
+    def _get_cache_key(self, csv_filepath):
+        """
+        Identify the CSV contents by modification time and size.
+
+        The preprocessing code is part of the key too, so editing this module or
+        fm_match_ready_selector.py invalidates the cache.
+        """
+        stat = os.stat(csv_filepath)
+        sources = [sys.modules[MatchReadySelector.__module__].__file__, os.path.abspath(__file__)]
+        source_mtimes = tuple(os.stat(source).st_mtime_ns for source in sources)
+        return (self.CACHE_VERSION, stat.st_mtime_ns, stat.st_size) + source_mtimes
+
+    def _load_cache(self, cache_path, cache_key):
+        """Return the cached preprocessing result, or None if missing or stale."""
+        try:
+            with open(cache_path, 'rb') as f:
+                cached = pickle.load(f)
+        except Exception:
+            return None
+        if not isinstance(cached, dict) or cached.get('key') != cache_key:
+            return None
+        return cached
+
+    def _save_cache(self, cache_path, cache_key):
+        """Write the preprocessed data atomically; failures only cost the speedup."""
+        payload = {'key': cache_key, 'df': self.df, 'player_hierarchy': self.player_hierarchy}
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(cache_path)), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except Exception:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
     def _get_best_hierarchy_tier(self, player_name):
         """
         Get the player's best (lowest) hierarchy tier across all positions.
@@ -122,564 +224,417 @@ class PlayerRemovalAdvisor:
                 - best_tier: 1, 2, or 3 (lowest tier across all positions)
                 - positions_dict: {position: tier} for all positions where player has a tier
         """
-        if not self.player_hierarchy:
+        positions_dict = self._tier_by_name.get(player_name)
+        if not positions_dict:
             return 3, {}
+        return min(positions_dict.values()), dict(positions_dict)
 
-        positions_dict = {}
-        best_tier = 3
-
-        for pos_name, tiers in self.player_hierarchy.items():
-            if tiers['starting'][0] == player_name:
-                positions_dict[pos_name] = 1
-                best_tier = min(best_tier, 1)
-            elif tiers['second'][0] == player_name:
-                positions_dict[pos_name] = 2
-                best_tier = min(best_tier, 2)
-
-        return best_tier, positions_dict
-
-    def _parse_currency(self, val):
-        """Convert currency string like '$1,234' to numeric 1234."""
-        if pd.isna(val):
-            return 0
-        if isinstance(val, (int, float)):
-            return float(val)
-        # Remove $ and commas
-        cleaned = re.sub(r'[$,]', '', str(val))
-        try:
-            return float(cleaned)
-        except:
-            return 0
-
-    def _get_best_position_skill(self, row):
-        """Get player's best position skill rating."""
-        positions_str = row.get('Positions', '')
-
-        # Try to find skill column for player's position
-        if pd.notna(positions_str):
-            # Positions can be comma-separated
-            positions = str(positions_str).split(',')
-            best_skill = 0
-            best_col = None
-
-            for pos in positions:
-                pos = pos.strip()
-                skill_col = self.POSITION_TO_SKILL.get(pos)
-                if skill_col and skill_col in self.df.columns:
-                    val = row.get(skill_col, 0)
-                    if pd.notna(val) and val > best_skill:
-                        best_skill = val
-                        best_col = skill_col
-
-            if best_col:
-                return best_skill, best_col
-
-        # Fallback: find their highest skill
-        skill_cols = ['GK', 'D(C)', 'D(R/L)', 'DM(L)', 'DM(R)', 'AM(L)', 'AM(C)', 'AM(R)', 'Striker']
-        best_skill = 0
-        best_col = None
-
-        for col in skill_cols:
-            if col in self.df.columns:
-                val = row.get(col, 0)
-                if pd.notna(val) and val > best_skill:
-                    best_skill = val
-                    best_col = col
+    def _invert_player_hierarchy(self):
+        """
+        Index the hierarchy by player for _get_best_hierarchy_tier.
 
-        return best_skill, best_col
+        Returns:
+            dict: {player_name: {position: tier}} in hierarchy position order,
+                  where the Starting XI pick wins over the Second XI pick
+        """
+        tier_by_name = {}
+        for pos_name, tiers in (self.player_hierarchy or {}).items():
+            starting_name = tiers['starting'][0]
+            tier_by_name.setdefault(starting_name, {})[pos_name] = 1
+            second_name = tiers['second'][0]
+            if second_name != starting_name:
+                tier_by_name.setdefault(second_name, {})[pos_name] = 2
+        return tier_by_name
+
+    def _parse_currency(self, values):
+        """Convert a column of currency strings like '$1,234' to numeric 1234 (0 if unparseable)."""
+        if not pd.api.types.is_numeric_dtype(values):
+            # Remove $ and commas for the whole column in one translate pass
+            values = values.astype(str).str.translate(_CURRENCY_STRIP).str.strip()
+        return pd.to_numeric(values, errors='coerce').fillna(0).astype(float)
+
+    def _column_equals(self, df, col, value):
+        """
+        Boolean mask of rows whose str(df[col]) equals value.
 
-    def _calculate_termination_cost(self, row):
+        Categorical columns compare integer codes against the matching
+        categories instead of converting every row to a string.
+        """
+        if col not in df.columns:
+            return np.zeros(len(df), dtype=bool)
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            matching = [code for code, category in enumerate(series.cat.categories) if str(category) == value]
+            return np.isin(series.cat.codes.to_numpy(), matching)
+        return series.astype(str).to_numpy() == value
+
+    def _get_best_position_skill_columns(self):
+        """
+        Get each player's best position skill column for the whole squad.
+
+        Only positive skills count. The positions listed in 'Positions' win over the
+        all-skills fallback, higher skill wins within a group, and ties go to the
+        earlier listed position (or the earlier column in SKILL_COLUMNS order).
+
+        Returns:
+            List with the best skill column (or None) for each row of self.df
         """
-        Calculate contract termination cost.
+        n = len(self.df)
+        skill_cols = self._available_skill_cols
+        if n == 0 or not skill_cols:
+            return [None] * n
+
+        col_index = {col: j for j, col in enumerate(skill_cols)}
+        skills = self.df[skill_cols].to_numpy(dtype=float)
+
+        # Order in which each skill column first appears in the player's Positions list,
+        # parsed once per distinct Positions string and broadcast to rows by category code
+        if 'Positions' in self.df.columns:
+            positions = self.df['Positions'].astype('category')
+            tokens = pd.Series(positions.cat.categories).astype(str).str.split(',').explode()
+            listed = pd.DataFrame({
+                'cat': tokens.index,
+                'order': tokens.groupby(level=0).cumcount().to_numpy(),
+                'col': tokens.str.strip().map(self.POSITION_TO_SKILL).map(col_index).to_numpy(),
+            }).dropna(subset=['col'])
+            first_listed = listed.groupby(['cat', 'col'])['order'].min()
+            codes = positions.cat.codes.to_numpy()
+            n_categories = len(positions.cat.categories)
+        else:
+            first_listed = pd.Series(dtype=float)
+            codes = np.full(n, -1)
+            n_categories = 0
+
+        # Trailing all-inf row serves missing Positions (category code -1)
+        category_order = np.full((n_categories + 1, len(skill_cols)), np.inf)
+        category_order[first_listed.index.get_level_values('cat').to_numpy(dtype=int),
+                       first_listed.index.get_level_values('col').to_numpy(dtype=int)] = first_listed.to_numpy()
+        listed_order = category_order[codes]
+
+        # Only positive skills count (NaN > 0 is False)
+        positive = skills > 0
+
+        # 1. Best skill among listed positions, earliest listing on ties
+        listed_skills = np.where(positive & np.isfinite(listed_order), skills, -np.inf)
+        listed_best = listed_skills.max(axis=1)
+        tied = (listed_skills == listed_best[:, None]) & np.isfinite(listed_skills)
+        listed_pick = np.where(tied, listed_order, np.inf).argmin(axis=1)
+        has_listed = np.isfinite(listed_best)
+
+        # 2. Fallback: highest skill overall, first column on ties
+        fallback_skills = np.where(positive, skills, -np.inf)
+        fallback_pick = fallback_skills.argmax(axis=1)
+        has_fallback = np.isfinite(fallback_skills.max(axis=1))
+
+        # Gather column names by index; the extra trailing slot is None (no positive skill)
+        choices = np.array(skill_cols + [None], dtype=object)
+        picks = np.where(has_listed, listed_pick, np.where(has_fallback, fallback_pick, len(skill_cols)))
+        return choices[picks].tolist()
+
+    def _calculate_termination_costs(self, df):
+        """
+        Calculate contract termination costs for every player in df.
         Per research: Release on a Free = entire remaining contract value upfront
         Mutual termination typically 50-60% of remaining value.
 
-        Returns (release_cost, mutual_termination_estimate)
+        Returns (release_costs, mutual_termination_estimates) as float arrays aligned with df.
         """
-        wages_weekly = row.get('Wages_Numeric', 0)
-        months_left = row.get('Months Left (Contract)', 0)
-        contract_type = row.get('Contract Type', '')
-        loan_status = row.get('LoanStatus', 'Own')
-
-        # Loaned-in players: no termination cost (we don't own them)
-        if loan_status == 'LoanedIn':
-            return 0, 0
+        n = len(df)
+        wages_weekly = df['Wages_Numeric'].to_numpy(dtype=float) if 'Wages_Numeric' in df.columns else np.zeros(n)
+        if 'Months Left (Contract)' in df.columns:
+            months_left = df['Months Left (Contract)'].to_numpy(dtype=float)
+        else:
+            months_left = np.zeros(n)
+        non_contract = self._column_equals(df, 'Contract Type', '4')
+        loaned_in = self._column_equals(df, 'LoanStatus', 'LoanedIn')
 
-        # Non-contract (type 4) has no termination cost
-        if str(contract_type) == '4' or months_left < 0:
-            return 0, 0
+        # Loaned-in (not our contract) and non-contract players have no termination cost
+        no_cost = loaned_in | non_contract | (months_left < 0)
 
-        # Calculate total remaining wages
-        # Weekly wage * 4.33 weeks/month * months remaining
+        # Weekly wage * 4.33 weeks/month * months remaining (missing months count as 0)
         weekly_to_monthly = 4.33
-        total_remaining = wages_weekly * weekly_to_monthly * max(0, months_left)
+        total_remaining = wages_weekly * weekly_to_monthly * np.where(months_left > 0, months_left, 0)
+        release_costs = np.where(no_cost, 0.0, total_remaining)
 
         # Mutual termination estimate (55% average of 50-60%)
-        mutual_estimate = total_remaining * 0.55
-
-        return total_remaining, mutual_estimate
+        return release_costs, release_costs * 0.55
 
     def _get_position_rank(self, player_name, skill_col):
         """Get player's rank among position competitors (1 = best)."""
-        if skill_col not in self.df.columns:
-            return 0, 0
-
-        # Sort by this skill descending
-        sorted_df = self.df.sort_values(by=skill_col, ascending=False)
-
-        # Find player's rank
-        rank = 1
-        for idx, row in sorted_df.iterrows():
-            if row['Name'] == player_name:
-                return rank, len(sorted_df)
-            rank += 1
-
-        return 0, len(sorted_df)
-
-    def _get_position_role(self, skill_col):
+        # Sort each skill column once and reuse the ranks for every player
+        ranks = self._position_rank_cache.get(skill_col)
+        if ranks is None:
+            if skill_col not in self.df.columns:
+                return 0, 0
+
+            # Sort by this skill descending, sorting only the skill column rather than
+            # the whole frame (same order as self.df.sort_values(by=skill_col))
+            order = pd.Series(self.df[skill_col].to_numpy()).sort_values(ascending=False).index.to_numpy()
+            sorted_names = self.df['Name'].to_numpy()[order].tolist()
+
+            # First occurrence of a name sets its rank, so build the table from the
+            # bottom up and let earlier entries overwrite
+            ranks = dict(zip(reversed(sorted_names), range(len(sorted_names), 0, -1)))
+            self._position_rank_cache[skill_col] = ranks
+
+        return ranks.get(player_name, 0), len(self.df)
+
+    def _classify_removal_priorities(self, batch, rows, skill_cols, position_ranks, total_players,
+                                     squad_avg_ca, release_costs, hierarchy_tiers, hierarchy_positions):
         """
-        Classify player's primary role for position-specific thresholds.
-        Based on retention strategy research which defines different standards by role.
-        """
-        if skill_col == 'GK':
-            return 'goalkeeper'
-        elif skill_col in ['D(C)', 'D(R/L)']:
-            return 'defender'
-        elif skill_col in ['DM(L)', 'DM(R)', 'AM(C)']:
-            return 'playmaker'
-        elif skill_col in ['AM(L)', 'AM(R)', 'Striker']:
-            return 'attacker'
-        return 'general'
-
-    def _calculate_growth_velocity(self, ca, pa, age):
-        """
-        Calculate Required Growth Velocity (RGV) to reach PA by peak age (24).
-        Research formula: RGV = (PA - CA) / (24 - Current Age)
+        Classify removal priority for a batch of players based on research criteria.
 
-        If RGV > 15 CA/year and low professionalism, player is unlikely to reach PA.
-        These are "False Wonderkids" - valued highly by market but structurally
-        incapable of reaching their theoretical ceiling.
-        """
-        if age >= 24 or pa <= ca:
-            return 0  # Past peak or at ceiling
-
-        years_to_peak = 24 - age
-        if years_to_peak <= 0:
-            return 0
-
-        required_ca_per_year = (pa - ca) / years_to_peak
-        return required_ca_per_year
-
-    def _classify_removal_priority(self, row, skill, skill_col, position_rank, total_players,
-                                   squad_avg_ca, release_cost, hierarchy_tier=3, hierarchy_positions=None):
-        """
-        Classify player removal priority based on research criteria.
+        Every scoring rule is evaluated as a boolean mask over column arrays and the
+        priority scores are summed as column arithmetic. Only the reason strings are
+        assembled per player, in rule order.
 
         Args:
-            hierarchy_tier: Player's best tier across all positions (1=Starting XI, 2=Second XI, 3=Backup)
-            hierarchy_positions: Dict of {position: tier} for positions where player is Tier 1 or 2
+            batch: DataFrame of the players to classify
+            rows: Records of batch (row.get access, used for reason formatting)
+            skill_cols, position_ranks, total_players, release_costs,
+            hierarchy_tiers, hierarchy_positions: Per-player inputs aligned with rows
+            squad_avg_ca: Squad average CA
 
-        Returns dict with priority, reasons, action, scores, and metadata
+        Returns:
+            List of result dicts (priority, reasons, action, scores and metadata), one per row
         """
-        if hierarchy_positions is None:
-            hierarchy_positions = {}
-        reasons = []
-        ca = row.get('CA', 0)
-        pa = row.get('PA', 0)
-        age = row.get('Age', 30)  # Default to older if unknown
-        wages = row.get('Wages_Numeric', 0)
-        contract_type = row.get('Contract Type', '')
-        months_left = row.get('Months Left (Contract)', 0)
-        asking_price = row.get('Asking_Price_Numeric', 0)
-        loan_status = row.get('LoanStatus', 'Own')
-
-        # Hidden attributes (from research - impact squad stability and development)
-        consistency = row.get('Consistency', 10)
-        important_matches = row.get('Important Matches', 10)
-        injury_proneness = row.get('Injury Proneness', 10)
-        ambition = row.get('Ambition', 10)
-        loyalty = row.get('Loyalty', 10)
-        professional = row.get('Professional', 10)
-        # New hidden attributes from retention strategy research
-        controversy = row.get('Controversy', 10)
-        temperament = row.get('Temperament', 10)
-        determination = row.get('Determination', 10)
-        natural_fitness = row.get('Natural Fitness', 10)
-        pressure = row.get('Pressure', 10)
-
-        # Calculate development headroom
-        development_headroom = (pa - ca) if (pa > 0 and ca > 0) else 0
-        headroom_percentage = (development_headroom / ca * 100) if ca > 0 else 0
-
-        # Check if loaned in
-        is_loaned_in = (loan_status == 'LoanedIn')
-
-        # Calculate wage efficiency (CA per wage)
-        wage_efficiency = ca / wages if wages > 0 else float('inf')
-
-        # Calculate Required Growth Velocity (RGV) for young players
-        required_growth_velocity = self._calculate_growth_velocity(ca, pa, age)
-
-        # Get position role for position-specific thresholds
-        position_role = self._get_position_role(skill_col)
-
-        # Track if player is a mentor candidate
-        is_mentor_candidate = False
-
-        priority_score = 0  # Higher = more need to remove
-
-        # ============================================
-        # LOAN PLAYERS: Use loan-specific logic
-        # ============================================
-        if is_loaned_in:
-            # Loan players get simplified scoring based on performance/utility
-            # Skip: termination cost, wage deadwood (not our wages), contract expiry
-
-            # Position depth analysis still applies
-            if total_players > 0:
-                position_percentile = position_rank / total_players
-                if position_percentile > 0.7:  # Bottom 30%
-                    priority_score += 30
-                    reasons.append(f"Bottom {int((1-position_percentile)*100)}% at position (rank #{position_rank})")
-
-            # Hierarchy-based analysis for loans
-            if hierarchy_tier == 1:
-                tier1_positions = [p for p, t in hierarchy_positions.items() if t == 1]
-                priority_score -= 30  # Moderate protection for loans
-                reasons.append(f"🏆 Starting XI quality at: {', '.join(tier1_positions)}")
-            elif hierarchy_tier == 2:
-                tier2_positions = [p for p, t in hierarchy_positions.items() if t == 2]
-                priority_score -= 15
-                reasons.append(f"📋 Second XI quality at: {', '.join(tier2_positions)}")
-            elif hierarchy_tier == 3 and not hierarchy_positions:
-                priority_score += 20
-                reasons.append("⚠️ Not competitive for Starting/Second XI")
-
-            # Below squad average CA
-            if ca < squad_avg_ca * 0.85:
-                priority_score += 25
-                reasons.append(f"CA ({ca}) significantly below squad average ({squad_avg_ca:.0f})")
-            elif ca < squad_avg_ca:
-                priority_score += 10
-                reasons.append(f"CA ({ca}) below squad average ({squad_avg_ca:.0f})")
-
-            # Hidden attribute red flags still apply
-            if pd.notna(consistency) and consistency < 8:
-                priority_score += 20
-                reasons.append(f"Low consistency ({consistency}) - unreliable over season")
-
-            if pd.notna(important_matches) and important_matches < 8:
-                priority_score += 15
-                reasons.append(f"Low big match performance ({important_matches})")
-
-            if pd.notna(injury_proneness) and injury_proneness > 14:
-                priority_score += 25
-                reasons.append(f"High injury proneness ({injury_proneness}) - frequent disruptions")
-
-            # Loan-specific actions based on priority
-            if priority_score >= 50:
-                priority = "End Early"
-                action = "End loan early - not contributing"
-            elif priority_score >= 25:
-                priority = "Monitor"
-                action = "Do not extend/make permanent"
-            else:
-                priority = "Keep"
-                if ca >= squad_avg_ca and position_rank <= 3:
-                    action = "Consider making permanent"
-                else:
-                    action = "Keep until loan expires"
-
-            # Return dictionary format for consistency
-            return {
-                'priority': priority,
+        n = len(rows)
+
+        def column(name, default):
+            if name in batch.columns:
+                return batch[name].to_numpy(dtype=float)
+            return np.full(n, default, dtype=float)
+
+        ca = column('CA', 0)
+        pa = column('PA', 0)
+        age = column('Age', 30)  # Default to older if unknown
+        wages = column('Wages_Numeric', 0)
+        months_left = column('Months Left (Contract)', 0)
+        asking_price = column('Asking_Price_Numeric', 0)
+        consistency = column('Consistency', 10)
+        important_matches = column('Important Matches', 10)
+        injury_proneness = column('Injury Proneness', 10)
+        ambition = column('Ambition', 10)
+        professional = column('Professional', 10)
+        controversy = column('Controversy', 10)
+        temperament = column('Temperament', 10)
+        determination = column('Determination', 10)
+        natural_fitness = column('Natural Fitness', 10)
+
+        is_loaned_in = self._column_equals(batch, 'LoanStatus', 'LoanedIn')
+        non_contract = self._column_equals(batch, 'Contract Type', '4')
+        owned = ~is_loaned_in
+
+        rank = np.asarray(position_ranks, dtype=float)
+        total = np.asarray(total_players, dtype=float)
+        release_cost = np.asarray(release_costs, dtype=float)
+        tier = np.asarray(hierarchy_tiers)
+        untiered = np.array([not positions for positions in hierarchy_positions], dtype=bool)
+        roles = [self.POSITION_ROLES.get(skill_col, 'general') for skill_col in skill_cols]
+        role = np.array(roles, dtype=object)
+
+        # Development headroom, wage efficiency and Required Growth Velocity.
+        # RGV = (PA - CA) / (24 - age) is the CA/year needed to reach PA by peak age;
+        # above 15 with low professionalism marks a "False Wonderkid"
+        with np.errstate(divide='ignore', invalid='ignore'):
+            development_headroom = np.where((pa > 0) & (ca > 0), pa - ca, 0)
+            headroom_percentage = np.where(ca > 0, development_headroom / ca * 100, 0)
+            wage_efficiency = np.where(wages > 0, ca / wages, np.inf)
+            years_to_peak = 24 - age
+            required_growth_velocity = np.where(
+                (age >= 24) | (pa <= ca) | (years_to_peak <= 0), 0, (pa - ca) / years_to_peak
+            )
+            position_percentile = np.where(total > 0, rank / total, 0)
+
+        has_position_depth = total > 0
+        bottom_of_position = has_position_depth & (position_percentile > 0.7)
+        ca_far_below = ca < squad_avg_ca * 0.85
+        ca_below = ~ca_far_below & (ca < squad_avg_ca)
+
+        def bottom_reason(i, row):
+            return f"Bottom {int((1-position_ranks[i]/total_players[i])*100)}% at position (rank #{position_ranks[i]})"
+
+        def tier_positions(i, wanted):
+            return ', '.join(p for p, t in hierarchy_positions[i].items() if t == wanted)
+
+        # Rules as (mask, points, reason); reason is a string or f(i, row) -> string
+        loan_rules = [
+            (bottom_of_position, 30, bottom_reason),
+            (tier == 1, -30, lambda i, row: f"🏆 Starting XI quality at: {tier_positions(i, 1)}"),
+            (tier == 2, -15, lambda i, row: f"📋 Second XI quality at: {tier_positions(i, 2)}"),
+            ((tier == 3) & untiered, 20, "⚠️ Not competitive for Starting/Second XI"),
+            (ca_far_below, 25, lambda i, row: f"CA ({row.get('CA', 0)}) significantly below squad average ({squad_avg_ca:.0f})"),
+            (ca_below, 10, lambda i, row: f"CA ({row.get('CA', 0)}) below squad average ({squad_avg_ca:.0f})"),
+            (consistency < 8, 20, lambda i, row: f"Low consistency ({row.get('Consistency', 10)}) - unreliable over season"),
+            (important_matches < 8, 15, lambda i, row: f"Low big match performance ({row.get('Important Matches', 10)})"),
+            (injury_proneness > 14, 25, lambda i, row: f"High injury proneness ({row.get('Injury Proneness', 10)}) - frequent disruptions"),
+        ]
+
+        defensive_spine = (role == 'goalkeeper') | (role == 'defender')
+        playmaker = role == 'playmaker'
+        attacker = role == 'attacker'
+
+        # 11. Mentor candidates (needed before the age penalties that exclude them)
+        mentor = (age >= 30) & (professional >= 16)
+        mentor_with_determination = mentor & (determination >= 15)
+
+        owned_rules = [
+            # 1. Non-contract players
+            (non_contract, 50, "Non-contract player - can be released freely"),
+            # 2. Position depth analysis
+            (bottom_of_position, 30, bottom_reason),
+            (has_position_depth & ~bottom_of_position & (rank <= 2), -30,
+             lambda i, row: f"Key player: Ranked #{position_ranks[i]} at {skill_cols[i]} - starter/first backup"),
+            # 2b. Hierarchy-based analysis
+            (tier == 1, -40, lambda i, row: f"🏆 Starting XI player at: {tier_positions(i, 1)}"),
+            (tier == 2, -20, lambda i, row: f"📋 Second XI player at: {tier_positions(i, 2)}"),
+            ((tier == 3) & untiered, 15, "⚠️ Not in Starting XI or Second XI at any position"),
+            # 3. Below squad average CA
+            (ca_far_below, 25, lambda i, row: f"CA ({row.get('CA', 0)}) significantly below squad average ({squad_avg_ca:.0f})"),
+            (ca_below, 10, lambda i, row: f"CA ({row.get('CA', 0)}) below squad average ({squad_avg_ca:.0f})"),
+            # 4. Wage deadwood
+            ((wages > 500) & (wage_efficiency < 0.1), 35,
+             lambda i, row: f"Poor wage efficiency: ${row.get('Wages_Numeric', 0):.0f}/week for {row.get('CA', 0)} CA"),
+            (~((wages > 500) & (wage_efficiency < 0.1)) & (wages > 300) & (wage_efficiency < 0.15), 20,
+             "Below average wage efficiency"),
+            # 5. Contract running down
+            ((0 < months_left) & (months_left <= 6), 25,
+             lambda i, row: f"Contract expires in {row.get('Months Left (Contract)', 0)} months - sell now or lose value"),
+            ((6 < months_left) & (months_left <= 12), 15,
+             lambda i, row: f"Contract expires in {row.get('Months Left (Contract)', 0)} months - consider selling"),
+            # 6. Hidden attribute red flags
+            (consistency < 8, 25, lambda i, row: f"Critical: Low consistency ({row.get('Consistency', 10)}) - unreliable performer"),
+            ((consistency >= 8) & (consistency < 9), 15, lambda i, row: f"Low consistency ({row.get('Consistency', 10)}) - variance risk"),
+            (important_matches < 8, 20,
+             lambda i, row: f"Low big match performance ({row.get('Important Matches', 10)}) - chokes under pressure"),
+            (injury_proneness > 14, 25,
+             lambda i, row: f"High injury proneness ({row.get('Injury Proneness', 10)}) - frequent disruptions"),
+            (professional < 8, 25,
+             lambda i, row: f"Critical: Low professionalism ({row.get('Professional', 10)}) - will not reach potential"),
+            ((professional >= 8) & (professional < 10), 15,
+             lambda i, row: f"Low professionalism ({row.get('Professional', 10)}) - development/longevity risk"),
+            (ambition < 6, 25, lambda i, row: f"Low ambition ({row.get('Ambition', 10)}) - lacks drive to improve"),
+            (controversy > 16, 25,
+             lambda i, row: f"High controversy ({row.get('Controversy', 10)}) - destabilizes team dynamics"),
+            (temperament < 8, 15, lambda i, row: f"Low temperament ({row.get('Temperament', 10)}) - prone to indiscipline"),
+            # 7. Position-specific retention thresholds
+            (defensive_spine & (consistency < 13), 15,
+             lambda i, row: f"Below defensive spine threshold (Consistency {row.get('Consistency', 10)} < 13)"),
+            (defensive_spine & (important_matches < 12), 10,
+             lambda i, row: f"Below defensive spine threshold (Big Matches {row.get('Important Matches', 10)} < 12)"),
+            (playmaker & (ambition < 14), 10,
+             lambda i, row: f"Below playmaker threshold (Ambition {row.get('Ambition', 10)} < 14)"),
+            (playmaker & (professional < 14), 10,
+             lambda i, row: f"Below playmaker threshold (Pro {row.get('Professional', 10)} < 14)"),
+            (attacker & (important_matches < 14), 15,
+             lambda i, row: f"Below striker threshold (Big Matches {row.get('Important Matches', 10)} < 14)"),
+            (attacker & (ambition < 15), 10,
+             lambda i, row: f"Below striker threshold (Ambition {row.get('Ambition', 10)} < 15)"),
+            # 8. False wonderkid detection
+            ((age <= 20) & (required_growth_velocity > 15) & (professional < 14), 35,
+             lambda i, row: f"False Wonderkid: Needs {required_growth_velocity[i]:.0f} CA/year to reach PA, unlikely with Pro {row.get('Professional', 10)}"),
+            # 9. Development checkpoints (18-21-24)
+            ((age == 18) & (professional < 8), 25, "Age 18 checkpoint: Low professionalism - release candidate"),
+            ((19 <= age) & (age <= 21) & (pa - ca > 50) & (professional < 12), 30,
+             lambda i, row: f"Age 21 window: Large CA gap ({row.get('PA', 0) - row.get('CA', 0)}) with low Pro ({row.get('Professional', 10)}) - sell while PA looks high"),
+            ((23 <= age) & (age <= 24) & (ca < squad_avg_ca) & (headroom_percentage < 10), 20,
+             "Age 24 checkpoint: Below average and near ceiling - last chance to sell on potential"),
+            # 10. U21 development protection
+            ((age <= 21) & (headroom_percentage >= 30), -30,
+             lambda i, row: f"U21 prospect with high potential ({headroom_percentage[i]:.0f}% room to grow)"),
+            ((age <= 21) & (headroom_percentage >= 15) & (headroom_percentage < 30), -15,
+             lambda i, row: f"U21 with development potential ({headroom_percentage[i]:.0f}% room to grow)"),
+            # 11. Mentor retention value
+            (mentor_with_determination, -40,
+             lambda i, row: f"Mentor value: High Pro ({row.get('Professional', 10)}) + Det ({row.get('Determination', 10)}) - valuable for youth development"),
+            (mentor & ~mentor_with_determination, -20,
+             lambda i, row: f"Mentor value: High professionalism ({row.get('Professional', 10)}) - consider keeping for mentoring"),
+            # 12. Peak value divestment windows & age penalties
+            ((age >= 29) & attacker & (natural_fitness < 12), 20,
+             lambda i, row: f"Approaching decline: Physical attacker age {row.get('Age', 30)} with low Natural Fitness ({row.get('Natural Fitness', 10)})"),
+            ((age >= 30) & (headroom_percentage < 5) & ~mentor, 10, "Veteran with limited development potential"),
+            ((age >= 32) & ~mentor, 5, lambda i, row: f"Age {row.get('Age', 30)} - approaching career end"),
+        ]
+
+        def total_score(rules, group):
+            score = np.zeros(n, dtype=int)
+            for mask, points, _ in rules:
+                score += np.where(mask & group, points, 0)
+            return score
+
+        priority_score = total_score(loan_rules, is_loaned_in) + total_score(owned_rules, owned)
+
+        # Priority category from the score band, then the recommended action per band
+        loan_band = np.searchsorted(self.LOAN_PRIORITY_THRESHOLDS, priority_score, side='right')
+        owned_band = np.searchsorted(self.OWNED_PRIORITY_THRESHOLDS, priority_score, side='right')
+        loan_priority = self.LOAN_PRIORITY_LABELS[loan_band]
+        owned_priority = self.OWNED_PRIORITY_LABELS[owned_band]
+        loan_action = np.select(
+            [loan_band == 2, loan_band == 1, (ca >= squad_avg_ca) & (rank <= 3)],
+            ["End loan early - not contributing", "Do not extend/make permanent", "Consider making permanent"],
+            "Keep until loan expires"
+        )
+        owned_action = np.select(
+            [
+                (owned_band == 3) & non_contract,
+                (owned_band == 3) & (asking_price > release_cost * 0.5),
+                owned_band == 3,
+                (owned_band == 2) & (asking_price > 0),
+                owned_band == 2,
+                owned_band == 1,
+            ],
+            [
+                "Release immediately (no cost)",
+                "Transfer List - high priority sale",
+                "Mutual Termination",
+                "Transfer List or Loan with Option",
+                "Loan out or Mutual Termination",
+                "Monitor - consider for rotation/development",
+            ],
+            "Keep - squad member"
+        )
+        is_mentor_candidate = mentor & owned
+
+        # Missing-value masks for the reported hidden attributes, one notna() per column
+        # (a column absent from the CSV falls back to the default of 10, so it counts as known)
+        known = {
+            name: batch[name].notna().to_numpy() if name in batch.columns else np.ones(n, dtype=bool)
+            for name in ['Ambition', 'Controversy', 'Temperament', 'Determination', 'Professional']
+        }
+
+        def optional_int(i, row, name):
+            return int(row.get(name, 10)) if known[name][i] else None
+
+        results = []
+        for i, row in enumerate(rows):
+            loan = bool(is_loaned_in[i])
+            rules = loan_rules if loan else owned_rules
+            reasons = [
+                reason if isinstance(reason, str) else reason(i, row)
+                for mask, _, reason in rules if mask[i]
+            ]
+            results.append({
+                'priority': str(loan_priority[i] if loan else owned_priority[i]),
                 'reasons': reasons,
-                'action': action,
-                'priority_score': priority_score,
-                'is_loaned_in': is_loaned_in,
-                'development_headroom': development_headroom,
-                'headroom_percentage': headroom_percentage,
+                'action': str(loan_action[i] if loan else owned_action[i]),
+                'priority_score': int(priority_score[i]),
+                'is_loaned_in': loan,
+                'development_headroom': float(development_headroom[i]),
+                'headroom_percentage': float(headroom_percentage[i]),
                 # Hierarchy-based analysis
-                'hierarchy_tier': hierarchy_tier,
-                'hierarchy_positions': hierarchy_positions,
-                # New fields (may not all apply to loans, but include for consistency)
-                'required_growth_velocity': required_growth_velocity,
-                'position_role': position_role,
-                'is_mentor_candidate': False,  # Loans can't be mentors
-                'ambition': int(ambition) if pd.notna(ambition) else None,
-                'controversy': int(controversy) if pd.notna(controversy) else None,
-                'temperament': int(temperament) if pd.notna(temperament) else None,
-                'determination': int(determination) if pd.notna(determination) else None,
-                'professional': int(professional) if pd.notna(professional) else None,
-            }
-
-        # ============================================
-        # OWNED PLAYERS: Full scoring logic
-        # Based on retention strategy research document
-        # ============================================
-
-        # 1. Non-Contract Players (Contract Type = 4)
-        if str(contract_type) == '4':
-            priority_score += 50
-            reasons.append("Non-contract player - can be released freely")
-
-        # 2. Position depth analysis
-        if total_players > 0:
-            position_percentile = position_rank / total_players
-            if position_percentile > 0.7:  # Bottom 30%
-                priority_score += 30
-                reasons.append(f"Bottom {int((1-position_percentile)*100)}% at position (rank #{position_rank})")
-            elif position_rank <= 2:  # Top 2 at position = STARTER, strong protection
-                priority_score -= 30
-                reasons.append(f"Key player: Ranked #{position_rank} at {skill_col} - starter/first backup")
-
-        # 2b. HIERARCHY-BASED ANALYSIS (Starting XI / Second XI rankings)
-        # This uses optimal lineup selection to identify truly essential players
-        if hierarchy_tier == 1:
-            # Player is the BEST at some position - critical to keep
-            tier1_positions = [p for p, t in hierarchy_positions.items() if t == 1]
-            priority_score -= 40  # Strong protection
-            reasons.append(f"🏆 Starting XI player at: {', '.join(tier1_positions)}")
-        elif hierarchy_tier == 2:
-            # Player is second-best at some position - important backup
-            tier2_positions = [p for p, t in hierarchy_positions.items() if t == 2]
-            priority_score -= 20  # Moderate protection
-            reasons.append(f"📋 Second XI player at: {', '.join(tier2_positions)}")
-        elif hierarchy_tier == 3 and not hierarchy_positions:
-            # Player is NOT in Starting XI or Second XI at ANY position
-            # This is a deep backup with limited squad value
-            priority_score += 15
-            reasons.append("⚠️ Not in Starting XI or Second XI at any position")
-
-        # 3. Below squad average CA
-        if ca < squad_avg_ca * 0.85:
-            priority_score += 25
-            reasons.append(f"CA ({ca}) significantly below squad average ({squad_avg_ca:.0f})")
-        elif ca < squad_avg_ca:
-            priority_score += 10
-            reasons.append(f"CA ({ca}) below squad average ({squad_avg_ca:.0f})")
-
-        # 4. Wage deadwood (high wages, low ability)
-        if wages > 500 and wage_efficiency < 0.1:
-            priority_score += 35
-            reasons.append(f"Poor wage efficiency: ${wages:.0f}/week for {ca} CA")
-        elif wages > 300 and wage_efficiency < 0.15:
-            priority_score += 20
-            reasons.append(f"Below average wage efficiency")
-
-        # 5. Contract running down (loss of leverage)
-        if 0 < months_left <= 6:
-            priority_score += 25
-            reasons.append(f"Contract expires in {months_left} months - sell now or lose value")
-        elif 0 < months_left <= 12:
-            priority_score += 15
-            reasons.append(f"Contract expires in {months_left} months - consider selling")
-
-        # ============================================
-        # 6. HIDDEN ATTRIBUTE RED FLAGS (Research-based thresholds)
-        # ============================================
-
-        # Consistency: Research says < 9 = Sell Zone (adjusted from < 8)
-        if pd.notna(consistency) and consistency < 9:
-            if consistency < 8:
-                priority_score += 25
-                reasons.append(f"Critical: Low consistency ({consistency}) - unreliable performer")
-            else:
-                priority_score += 15
-                reasons.append(f"Low consistency ({consistency}) - variance risk")
-
-        # Big Match Performance (Important Matches): < 8 = Hard Sell
-        if pd.notna(important_matches) and important_matches < 8:
-            priority_score += 20
-            reasons.append(f"Low big match performance ({important_matches}) - chokes under pressure")
-
-        # Injury Proneness: > 14 = Hard Sell (matches research)
-        if pd.notna(injury_proneness) and injury_proneness > 14:
-            priority_score += 25
-            reasons.append(f"High injury proneness ({injury_proneness}) - frequent disruptions")
-
-        # Professionalism: Research says < 10 = Hard Sell (adjusted from < 8)
-        if pd.notna(professional) and professional < 10:
-            if professional < 8:
-                priority_score += 25
-                reasons.append(f"Critical: Low professionalism ({professional}) - will not reach potential")
-            else:
-                priority_score += 15
-                reasons.append(f"Low professionalism ({professional}) - development/longevity risk")
-
-        # NEW: Ambition < 6 = Hard Sell (unambitious, stunted development)
-        if pd.notna(ambition) and ambition < 6:
-            priority_score += 25
-            reasons.append(f"Low ambition ({ambition}) - lacks drive to improve")
-
-        # NEW: Controversy > 16 = Toxic (destabilizes squad dynamics)
-        if pd.notna(controversy) and controversy > 16:
-            priority_score += 25
-            reasons.append(f"High controversy ({controversy}) - destabilizes team dynamics")
-
-        # NEW: Temperament < 8 = Indiscipline risk
-        if pd.notna(temperament) and temperament < 8:
-            priority_score += 15
-            reasons.append(f"Low temperament ({temperament}) - prone to indiscipline")
-
-        # ============================================
-        # 7. POSITION-SPECIFIC RETENTION THRESHOLDS
-        # Research: Different positions have different critical traits
-        # ============================================
-
-        if position_role == 'goalkeeper' or position_role == 'defender':
-            # Defensive spine needs high consistency and pressure handling
-            if pd.notna(consistency) and consistency < 13:
-                priority_score += 15
-                reasons.append(f"Below defensive spine threshold (Consistency {consistency} < 13)")
-            if pd.notna(important_matches) and important_matches < 12:
-                priority_score += 10
-                reasons.append(f"Below defensive spine threshold (Big Matches {important_matches} < 12)")
-
-        elif position_role == 'playmaker':
-            # Playmakers need ambition and professionalism to unlock potential
-            if pd.notna(ambition) and ambition < 14:
-                priority_score += 10
-                reasons.append(f"Below playmaker threshold (Ambition {ambition} < 14)")
-            if pd.notna(professional) and professional < 14:
-                priority_score += 10
-                reasons.append(f"Below playmaker threshold (Pro {professional} < 14)")
-
-        elif position_role == 'attacker':
-            # Strikers need to handle pressure and have killer instinct
-            if pd.notna(important_matches) and important_matches < 14:
-                priority_score += 15
-                reasons.append(f"Below striker threshold (Big Matches {important_matches} < 14)")
-            if pd.notna(ambition) and ambition < 15:
-                priority_score += 10
-                reasons.append(f"Below striker threshold (Ambition {ambition} < 15)")
-
-        # ============================================
-        # 8. FALSE WONDERKID DETECTION (RGV Analysis)
-        # Research: If RGV > 15 CA/year and low professionalism, unlikely to reach PA
-        # NOTE: Only applies to YOUNG players (≤20) - the formula breaks down near age 24
-        # ============================================
-
-        if age <= 20 and required_growth_velocity > 15:
-            if professional < 14:  # Not Model Professional level
-                priority_score += 35
-                reasons.append(f"False Wonderkid: Needs {required_growth_velocity:.0f} CA/year to reach PA, unlikely with Pro {professional}")
-
-        # ============================================
-        # 9. DEVELOPMENT CHECKPOINT SYSTEM (18-21-24)
-        # Research-based age checkpoints for release/sell decisions
-        # ============================================
-
-        # Age 18 checkpoint: Release if Professionalism < 8
-        if age == 18 and pd.notna(professional) and professional < 8:
-            priority_score += 25
-            reasons.append("Age 18 checkpoint: Low professionalism - release candidate")
-
-        # Age 21 checkpoint (False Wonderkid window): Sell if large CA gap and low Pro
-        if 19 <= age <= 21:
-            ca_gap = pa - ca
-            if ca_gap > 50 and professional < 12:
-                priority_score += 30
-                reasons.append(f"Age 21 window: Large CA gap ({ca_gap}) with low Pro ({professional}) - sell while PA looks high")
-
-        # Age 24 checkpoint (Final verdict): Last chance to sell on potential
-        if 23 <= age <= 24:
-            if ca < squad_avg_ca and headroom_percentage < 10:
-                priority_score += 20
-                reasons.append("Age 24 checkpoint: Below average and near ceiling - last chance to sell on potential")
-
-        # ============================================
-        # 10. U21 DEVELOPMENT PROTECTION
-        # (moderate - reduces but doesn't eliminate flags)
-        # ============================================
-
-        if age <= 21:
-            if headroom_percentage >= 30:  # PA is 30%+ higher than CA
-                priority_score -= 30  # Moderate protection
-                reasons.append(f"U21 prospect with high potential ({headroom_percentage:.0f}% room to grow)")
-            elif headroom_percentage >= 15:
-                priority_score -= 15
-                reasons.append(f"U21 with development potential ({headroom_percentage:.0f}% room to grow)")
-
-        # ============================================
-        # 11. MENTOR RETENTION VALUE
-        # Research: Keep high-Pro veterans as mentors for youth development
-        # ============================================
-
-        if age >= 30 and pd.notna(professional) and professional >= 16:
-            # Check if truly valuable mentor (Model Citizen/Professional level)
-            if pd.notna(determination) and determination >= 15:
-                priority_score -= 40  # Strong protection
-                is_mentor_candidate = True
-                reasons.append(f"Mentor value: High Pro ({professional}) + Det ({determination}) - valuable for youth development")
-            else:
-                priority_score -= 20
-                is_mentor_candidate = True
-                reasons.append(f"Mentor value: High professionalism ({professional}) - consider keeping for mentoring")
-
-        # ============================================
-        # 12. PEAK VALUE DIVESTMENT WINDOWS & AGE PENALTIES
-        # Research: Sell physical-dependent players before decline
-        # ============================================
-
-        # Physical position decline warning (Age 29+ attackers with low Natural Fitness)
-        if age >= 29 and position_role == 'attacker':
-            if pd.notna(natural_fitness) and natural_fitness < 12:
-                priority_score += 20
-                reasons.append(f"Approaching decline: Physical attacker age {age} with low Natural Fitness ({natural_fitness})")
-
-        # General age penalties (reduced weight to avoid double-counting with mentor logic)
-        if age >= 30 and headroom_percentage < 5 and not is_mentor_candidate:
-            priority_score += 10
-            reasons.append(f"Veteran with limited development potential")
-        if age >= 32 and not is_mentor_candidate:
-            priority_score += 5
-            reasons.append(f"Age {age} - approaching career end")
-
-        # Determine priority category and recommended action
-        if priority_score >= 80:
-            priority = "Critical"
-            if str(contract_type) == '4':
-                action = "Release immediately (no cost)"
-            elif asking_price > release_cost * 0.5:
-                action = "Transfer List - high priority sale"
-            else:
-                action = "Mutual Termination"
-        elif priority_score >= 50:
-            priority = "High"
-            if asking_price > 0:
-                action = "Transfer List or Loan with Option"
-            else:
-                action = "Loan out or Mutual Termination"
-        elif priority_score >= 30:
-            priority = "Medium"
-            action = "Monitor - consider for rotation/development"
-        else:
-            priority = "Low"
-            action = "Keep - squad member"
-
-        # Package all new fields for return
-        return {
-            'priority': priority,
-            'reasons': reasons,
-            'action': action,
-            'priority_score': priority_score,
-            'is_loaned_in': is_loaned_in,
-            'development_headroom': development_headroom,
-            'headroom_percentage': headroom_percentage,
-            # Hierarchy-based analysis
-            'hierarchy_tier': hierarchy_tier,
-            'hierarchy_positions': hierarchy_positions,
-            # New fields from retention strategy research
-            'required_growth_velocity': required_growth_velocity,
-            'position_role': position_role,
-            'is_mentor_candidate': is_mentor_candidate,
-            'ambition': int(ambition) if pd.notna(ambition) else None,
-            'controversy': int(controversy) if pd.notna(controversy) else None,
-            'temperament': int(temperament) if pd.notna(temperament) else None,
-            'determination': int(determination) if pd.notna(determination) else None,
-            'professional': int(professional) if pd.notna(professional) else None,
-        }
+                'hierarchy_tier': hierarchy_tiers[i],
+                'hierarchy_positions': hierarchy_positions[i],
+                # Retention strategy research fields
+                'required_growth_velocity': float(required_growth_velocity[i]),
+                'position_role': roles[i],
+                'is_mentor_candidate': bool(is_mentor_candidate[i]),
+                'ambition': optional_int(i, row, 'Ambition'),
+                'controversy': optional_int(i, row, 'Controversy'),
+                'temperament': optional_int(i, row, 'Temperament'),
+                'determination': optional_int(i, row, 'Determination'),
+                'professional': optional_int(i, row, 'Professional'),
+            })
+        return results
 
     def get_removal_recommendations(self):
         """
@@ -687,82 +642,126 @@ class PlayerRemovalAdvisor:
 
         Returns list of recommendations sorted by removal priority.
         """
-        recommendations = []
-
         # Calculate squad average CA
         squad_avg_ca = self.df['CA'].mean() if 'CA' in self.df.columns else 80
 
-        for idx, row in self.df.iterrows():
-            name = row.get('Name', 'Unknown')
-            ca = row.get('CA', 0)
-            pa = row.get('PA', 0)
-            age = row.get('Age', 0)
-            positions = row.get('Positions', '')
-            contract_type = row.get('Contract Type', '')
-            wages = row.get('Wages_Numeric', 0)
-            months_left = row.get('Months Left (Contract)', 0)
-            asking_price = row.get('Asking_Price_Numeric', 0)
-            loan_status = row.get('LoanStatus', 'Own')
-
-            # Skip if CA is NaN or zero (likely invalid entry)
-            if pd.isna(ca) or ca == 0:
-                continue
-
-            # Get best skill and position
-            best_skill, skill_col = self._get_best_position_skill(row)
+        # Best skill column per player, computed for the whole squad at once
+        best_skill_cols = self._get_best_position_skill_columns()
 
+        # Skip players whose CA is NaN or zero (likely invalid entry)
+        if 'CA' in self.df.columns:
+            valid = (self.df['CA'].notna() & (self.df['CA'] != 0)).to_numpy()
+        else:
+            valid = np.zeros(len(self.df), dtype=bool)
+        batch = self.df[valid]
+        skill_cols = [skill_col for skill_col, keep in zip(best_skill_cols, valid) if keep]
+
+        # Plain dict records support the same row.get() access as a Series row,
+        # without building a pd.Series for every player
+        rows = batch.to_dict('records')
+        names = [row.get('Name', 'Unknown') for row in rows]
+
+        # Calculate termination costs for the whole batch
+        release_costs, mutual_costs = self._calculate_termination_costs(batch)
+
+        # Per-player inputs for the batched classification
+        position_ranks, totals_at_position = [], []
+        hierarchy_tiers, hierarchy_positions_list = [], []
+        for name, skill_col in zip(names, skill_cols):
             # Get position rank
             position_rank, total_at_position = self._get_position_rank(name, skill_col)
-
-            # Calculate termination costs
-            release_cost, mutual_cost = self._calculate_termination_cost(row)
+            position_ranks.append(position_rank)
+            totals_at_position.append(total_at_position)
 
             # Get hierarchy tier (Starting XI = 1, Second XI = 2, Backup = 3)
             hierarchy_tier, hierarchy_positions = self._get_best_hierarchy_tier(name)
+            hierarchy_tiers.append(hierarchy_tier)
+            hierarchy_positions_list.append(hierarchy_positions)
+
+        # Classify removal priority for the whole batch (one result dictionary per player)
+        results = self._classify_removal_priorities(
+            batch, rows, skill_cols, position_ranks, totals_at_position,
+            squad_avg_ca, release_costs, hierarchy_tiers, hierarchy_positions_list
+        )
+
+        # Whole-number and rounded output fields, converted as column operations
+        def output_column(name):
+            if name in batch.columns:
+                return batch[name].to_numpy(dtype=float)
+            return np.zeros(len(batch))
+
+        def int_column(values):
+            return np.nan_to_num(values, nan=0.0).astype(int).tolist()  # Missing -> 0
+
+        ages_out = int_column(output_column('Age'))
+        cas_out = int_column(output_column('CA'))
+        pas_out = int_column(output_column('PA'))
+        months_out = np.where(output_column('Months Left (Contract)') > 0,
+                              output_column('Months Left (Contract)'), 0).astype(int).tolist()
+        wages_out = np.round(output_column('Wages_Numeric'), 0).tolist()
+        asking_out = np.round(output_column('Asking_Price_Numeric'), 0).tolist()
+        release_out = np.round(release_costs, 0).tolist()
+        mutual_out = np.round(mutual_costs, 0).tolist()
+
+        # Missing-value masks for the displayed hidden attributes, one notna() per column
+        displayed_known = {
+            name: batch[name].notna().to_numpy() if name in batch.columns else np.zeros(len(batch), dtype=bool)
+            for name in ['Consistency', 'Important Matches', 'Injury Proneness']
+        }
 
-            # Classify removal priority (now returns a dictionary)
-            result = self._classify_removal_priority(
-                row, best_skill, skill_col, position_rank, total_at_position,
-                squad_avg_ca, release_cost, hierarchy_tier, hierarchy_positions
-            )
+        # Emit players by priority score descending (highest = most need to remove);
+        # a stable argsort keeps squad order among equal scores
+        scores = np.array([result['priority_score'] for result in results], dtype=int)
+        order = np.argsort(-scores, kind='stable')
+
+        # Non-contract players (Contract Type = 4) are displayed as such
+        non_contract = self._column_equals(batch, 'Contract Type', '4')
 
-            # Format contract type display
-            contract_type_display = contract_type
-            if str(contract_type) == '4':
-                contract_type_display = "Non-Contract"
-
-            recommendations.append({
-                "name": name,
-                "age": int(age) if pd.notna(age) else 0,
-                "positions": str(positions) if pd.notna(positions) else "",
-                "ca": int(ca) if pd.notna(ca) else 0,
-                "pa": int(pa) if pd.notna(pa) else 0,
-                "squad_avg_ca": round(squad_avg_ca, 1),
-                "best_skill": round(best_skill, 1) if pd.notna(best_skill) else 0,
+        # Local aliases for the builtins called for every player below
+        _int, _round, _str, _notna = int, round, str, pd.notna
+        avg_ca_out = round(squad_avg_ca, 1)
+
+        # Every valid player gets exactly one entry, so fill a preallocated list by output slot
+        recommendations = [None] * len(order)
+        for slot, i in enumerate(order.tolist()):
+            row, skill_col, result = rows[i], skill_cols[i], results[i]
+            positions = row.get('Positions', '')
+
+            # Get best skill and position
+            best_skill = row.get(skill_col, 0) if skill_col else 0
+
+            recommendations[slot] = {
+                "name": names[i],
+                "age": ages_out[i],
+                "positions": _str(positions) if _notna(positions) else "",
+                "ca": cas_out[i],
+                "pa": pas_out[i],
+                "squad_avg_ca": avg_ca_out,
+                "best_skill": _round(best_skill, 1) if _notna(best_skill) else 0,
                 "skill_position": skill_col or "",
-                "position_rank": position_rank,
-                "total_at_position": total_at_position,
-                "contract_type": contract_type_display,
-                "wages_weekly": round(wages, 0),
-                "months_remaining": int(months_left) if pd.notna(months_left) and months_left > 0 else 0,
-                "asking_price": round(asking_price, 0),
-                "release_cost": round(release_cost, 0),
-                "mutual_termination_cost": round(mutual_cost, 0),
-                "loan_status": loan_status,
+                "position_rank": position_ranks[i],
+                "total_at_position": totals_at_position[i],
+                "contract_type": "Non-Contract" if non_contract[i] else row.get('Contract Type', ''),
+                "wages_weekly": wages_out[i],
+                "months_remaining": months_out[i],
+                "asking_price": asking_out[i],
+                "release_cost": release_out[i],
+                "mutual_termination_cost": mutual_out[i],
+                "loan_status": row.get('LoanStatus', 'Own'),
                 "is_loaned_in": result['is_loaned_in'],
                 "priority": result['priority'],
                 "priority_score": result['priority_score'],
                 "reasons": result['reasons'],
                 "recommended_action": result['action'],
                 # Development potential fields
-                "development_headroom": int(result['development_headroom']),
-                "headroom_percentage": round(result['headroom_percentage'], 1),
+                "development_headroom": _int(result['development_headroom']),
+                "headroom_percentage": _round(result['headroom_percentage'], 1),
                 # Hidden attributes for display (existing)
-                "consistency": int(row.get('Consistency', 0)) if pd.notna(row.get('Consistency')) else None,
-                "important_matches": int(row.get('Important Matches', 0)) if pd.notna(row.get('Important Matches')) else None,
-                "injury_proneness": int(row.get('Injury Proneness', 0)) if pd.notna(row.get('Injury Proneness')) else None,
+                "consistency": _int(row['Consistency']) if displayed_known['Consistency'][i] else None,
+                "important_matches": _int(row['Important Matches']) if displayed_known['Important Matches'][i] else None,
+                "injury_proneness": _int(row['Injury Proneness']) if displayed_known['Injury Proneness'][i] else None,
                 # NEW: Additional hidden attributes and analysis from retention strategy
-                "required_growth_velocity": round(result['required_growth_velocity'], 1) if result['required_growth_velocity'] else None,
+                "required_growth_velocity": _round(result['required_growth_velocity'], 1) if result['required_growth_velocity'] else None,
                 "position_role": result['position_role'],
                 "is_mentor_candidate": result['is_mentor_candidate'],
                 "ambition": result['ambition'],
@@ -773,46 +772,24 @@ class PlayerRemovalAdvisor:
                 # Hierarchy-based analysis (Starting XI / Second XI rankings)
                 "hierarchy_tier": result['hierarchy_tier'],
                 "hierarchy_positions": result['hierarchy_positions'],
-            })
-
-        # Sort by priority score descending (highest = most need to remove)
-        recommendations.sort(key=lambda x: -x['priority_score'])
+            }
 
         return recommendations
 
 
-# --- Custom JSON Encoder to handle numpy types ---
-class NumpyEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, (np.int_, np.intc, np.intp, np.int8,
-                            np.int16, np.int32, np.int64, np.uint8,
-                            np.uint16, np.uint32, np.uint64)):
-            return int(obj)
-        elif isinstance(obj, (np.float_, np.float16, np.float32,
-                              np.float64)):
-            return float(obj)
-        elif isinstance(obj, (np.ndarray,)):
-            return obj.tolist()
-        elif isinstance(obj, (np.bool_)):
-            return bool(obj)
-        return json.JSONEncoder.default(self, obj)
-
-
 def main():
     try:
-        # Read JSON from stdin (not needed for this endpoint)
-        input_str = sys.stdin.read()
-
-        # 1. UPDATE DATA FROM EXCEL
-        with suppress_stdout():
-            data_manager.update_player_data()
+        # 1. UPDATE DATA FROM EXCEL (skipped when the CSV is already up to date)
+        if not data_manager.player_data_is_current():
+            with suppress_stdout():
+                data_manager.update_player_data()
 
         csv_file = 'players-current.csv'
 
         advisor = PlayerRemovalAdvisor(csv_file)
         recommendations = advisor.get_removal_recommendations()
 
-        print(json.dumps({"success": True, "recommendations": recommendations}, cls=NumpyEncoder))
+        write_json({"success": True, "recommendations": recommendations})
 
     except Exception as e:
         import traceback
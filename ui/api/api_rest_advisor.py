@@ -1,7 +1,6 @@
 import sys
 import os
 import json
-import contextlib
 import pandas as pd
 import numpy as np
 
@@ -10,17 +9,14 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'
 
 from fm_match_ready_selector import MatchReadySelector
 import data_manager
+from api_utils import suppress_stdout, write_json
 
-@contextlib.contextmanager
-def suppress_stdout():
-    """Context manager to suppress stdout during initialization of parent class."""
-    with open(os.devnull, 'w') as devnull:
-        old_stdout = sys.stdout
-        sys.stdout = devnull
-        try:
-            yield
-        finally:
-            sys.stdout = old_stdout
+
+# Fatigue zones relative to the player's personal threshold, least to most severe
+FRESH, BUILDING, ACCUMULATING, APPROACHING_LIMIT, JADED, EXHAUSTED = range(6)
+
+# Base priority code per zone (0 Urgent, 1 High, 2 Medium, 3 Low), indexed by zone
+ZONE_PRIORITY = np.array([3, 3, 2, 1, 1, 0])
 
 class ApiRestAdvisor(MatchReadySelector):
     """
@@ -53,75 +49,121 @@ class ApiRestAdvisor(MatchReadySelector):
         """
         recommendations = []
 
-        for idx, row in self.df.iterrows():
-            player_name = row['Name']
-            age = row.get('Age', 25)
-            fatigue = row.get('Fatigue', 0)
-            condition = row.get('Condition', 100)
-            natural_fitness = row.get('Natural Fitness', 15)
-            stamina = row.get('Stamina', 15)
-            injury_proneness = row.get('Injury Proneness', None)
-            match_sharpness = row.get('Match Sharpness', 10000)
-
-            # Skip if fatigue data is missing or invalid
-            if pd.isna(fatigue):
-                continue
-
-            # Calculate personalized fatigue threshold based on player attributes
-            threshold = self._get_adjusted_fatigue_threshold(age, natural_fitness, stamina, injury_proneness)
-
-            # Calculate warning threshold (80% of personal threshold)
-            warning_threshold = threshold * 0.8
-
-            # Calculate fatigue zones relative to personal threshold
-            fatigue_percentage = (fatigue / threshold) * 100 if threshold > 0 else 0
+        # Pull each column once as plain Python values instead of building a Series per row
+        n = len(self.df)
+
+        def column(name, default):
+            if name in self.df.columns:
+                return self.df[name].tolist()
+            return [default] * n
+
+        def column_array(name, default):
+            if name in self.df.columns:
+                return self.df[name].to_numpy(dtype=float)
+            return np.full(n, default, dtype=float)
+
+        # Personalized fatigue thresholds (from player attributes) for the whole squad
+        fatigue_arr = column_array('Fatigue', 0)
+        injury_proneness_arr = (self.df['Injury Proneness'].to_numpy(dtype=float)
+                                if 'Injury Proneness' in self.df.columns else None)
+        threshold_arr = self._get_adjusted_fatigue_threshold_vec(
+            column_array('Age', 25), column_array('Natural Fitness', 15),
+            column_array('Stamina', 15), injury_proneness_arr
+        )
+        # Warning threshold is 80% of the personal threshold
+        warning_arr = threshold_arr * 0.8
+        percentage_arr = np.where(threshold_arr > 0, (fatigue_arr / threshold_arr) * 100, 0)
+
+        # Fatigue zone per player (NaN fatigue compares False everywhere and stays Fresh)
+        zone_arr = np.select(
+            [fatigue_arr >= threshold_arr + 100, fatigue_arr >= threshold_arr,
+             fatigue_arr >= warning_arr, fatigue_arr >= 250, fatigue_arr >= 100],
+            [EXHAUSTED, JADED, APPROACHING_LIMIT, ACCUMULATING, BUILDING],
+            default=FRESH
+        )
+
+        # Recovery estimates back to the neutral zone (250): vacation ~50/day, rest ~40/day
+        vacation_days = np.trunc((fatigue_arr - 250) / 50) + 1
+        rest_days = np.trunc((fatigue_arr - 250) / 40) + 1
+        recovery_days_arr = np.select(
+            [zone_arr == EXHAUSTED, zone_arr == JADED, zone_arr == APPROACHING_LIMIT],
+            [np.maximum(7, vacation_days), np.maximum(3, vacation_days), np.maximum(2, rest_days)],
+            default=0
+        ).astype(int)
+
+        # Priority code per player (0 Urgent .. 3 Low): set by the fatigue zone, and raised
+        # from Low to Medium by a run of 3+ consecutive starts
+        names = self.df['Name'].tolist()
+        consecutive_arr = np.array([self.player_match_count.get(name, 0) for name in names], dtype=int)
+        heavy_usage_arr = consecutive_arr >= 3
+        priority_arr = ZONE_PRIORITY[zone_arr]
+        priority_arr = np.where(heavy_usage_arr & (priority_arr == 3), 2, priority_arr)
+
+        # Only players who need attention are reported: any zone above Fresh (fatigue >= 100)
+        # or heavy usage. Missing fatigue compares False above, so test it explicitly
+        include = ~np.isnan(fatigue_arr) & ((zone_arr != FRESH) | heavy_usage_arr)
+
+        # Sort: Urgent > High > Medium > Low, then by fatigue descending (stable on squad order)
+        selected = np.flatnonzero(include)
+        selected = selected[np.lexsort((-fatigue_arr[selected], priority_arr[selected]))]
+
+        fatigues = column('Fatigue', 0)
+        conditions = column('Condition', 100)
+        sharpnesses = column('Match Sharpness', 10000)
+        thresholds = threshold_arr.tolist()
+        warnings = warning_arr.tolist()
+        percentages = percentage_arr.tolist()
+        zones = zone_arr.tolist()
+        recovery_days_list = recovery_days_arr.tolist()
+        consecutives = consecutive_arr.tolist()
+
+        _notna = pd.notna
+        append = recommendations.append
+
+        for i in selected.tolist():
+            player_name, fatigue, zone = names[i], fatigues[i], zones[i]
+            threshold, warning_threshold, recovery_days = thresholds[i], warnings[i], recovery_days_list[i]
 
             # Determine status, action, and recovery estimates
             status = "Fresh"
             action = "None"
             priority = "Low"
             reasons = []
-            recovery_days = 0
             recovery_method = ""
 
             # Fatigue-based logic (exclusive focus)
-            if fatigue >= threshold + 100:
+            if zone == EXHAUSTED:
                 # EXHAUSTED: Critical state, extended vacation required
                 status = "Exhausted"
                 priority = "Urgent"
-                excess = fatigue - 250  # Target: back to neutral zone
-                recovery_days = max(7, int(excess / 50) + 1)  # Vacation rate ~50/day
                 recovery_method = "vacation"
                 action = f"Vacation ({recovery_days}+ days)"
                 reasons.append(f"Fatigue {fatigue:.0f} is {fatigue - threshold:.0f} points over your limit")
                 reasons.append(f"Risk of injury and severe performance drop")
                 reasons.append(f"Vacation required to reset fatigue buffer")
 
-            elif fatigue >= threshold:
+            elif zone == JADED:
                 # JADED: Over threshold, vacation recommended
                 status = "Jaded"
                 priority = "High"
-                excess = fatigue - 250  # Target: back to neutral zone
-                recovery_days = max(3, int(excess / 50) + 1)  # Vacation rate ~50/day
                 recovery_method = "vacation"
                 action = f"Vacation ({recovery_days} days)"
                 reasons.append(f"Fatigue {fatigue:.0f} has reached your personal threshold ({threshold:.0f})")
                 reasons.append(f"Performance and mental attributes are being suppressed")
                 reasons.append(f"Vacation is the most effective recovery method")
 
-            elif fatigue >= warning_threshold:
+            elif zone == APPROACHING_LIMIT:
                 # APPROACHING LIMIT: Close to threshold, proactive rest needed
                 status = "Approaching Limit"
                 priority = "High"
                 buffer_remaining = threshold - fatigue
-                recovery_days = max(2, int((fatigue - 250) / 40) + 1)  # Rest rate ~40/day
                 recovery_method = "rest"
                 action = f"Rest from training ({recovery_days} days)"
                 reasons.append(f"Fatigue {fatigue:.0f} is approaching your limit ({threshold:.0f})")
                 reasons.append(f"Only {buffer_remaining:.0f} points of buffer remaining")
                 reasons.append(f"Rest now to avoid needing vacation later")
 
-            elif fatigue >= 250:
+            elif zone == ACCUMULATING:
                 # ACCUMULATING: Building load, rotation recommended
                 status = "Accumulating"
                 priority = "Medium"
@@ -132,7 +174,7 @@ class ApiRestAdvisor(MatchReadySelector):
                 reasons.append(f"Approximately {max(1, matches_until_threshold)} matches until rest needed")
                 reasons.append(f"Consider resting in low-priority fixtures")
 
-            elif fatigue >= 100:
+            elif zone == BUILDING:
                 # BUILDING: Early accumulation, just monitor
                 status = "Building"
                 priority = "Low"
@@ -142,69 +184,45 @@ class ApiRestAdvisor(MatchReadySelector):
                 reasons.append(f"Normal training and rotation will manage this")
 
             # Add consecutive match context if relevant
-            if player_name in self.player_match_count:
-                consecutive = self.player_match_count[player_name]
-                if consecutive >= 3:
-                    reasons.append(f"{consecutive} consecutive starts - rotation recommended")
-                    if priority == "Low":
-                        priority = "Medium"
-                        status = "Heavy Usage"
-                        action = "Rotate"
-
-            # Only include players who need attention (fatigue >= 100 or heavy usage)
-            if priority != "Low" or fatigue >= 100:
-                # Normalize sharpness and condition for display
-                sharpness_pct = match_sharpness / 10000 if pd.notna(match_sharpness) else 1.0
-                condition_pct = condition if pd.notna(condition) else 100
-                if condition_pct > 100:
-                    condition_pct = condition_pct / 100
-
-                recommendations.append({
-                    "name": player_name,
-                    "fatigue": fatigue,
-                    "condition": condition_pct,
-                    "sharpness": sharpness_pct,
-                    "status": status,
-                    "action": action,
-                    "priority": priority,
-                    "reasons": reasons,
-                    "threshold": threshold,
-                    "recovery_days": recovery_days,
-                    "recovery_method": recovery_method,
-                    "fatigue_percentage": fatigue_percentage,
-                    "warning_threshold": warning_threshold
-                })
-
-        # Sort: Urgent > High > Medium > Low, then by fatigue descending
-        priority_map = {"Urgent": 0, "High": 1, "Medium": 2, "Low": 3}
-        recommendations.sort(key=lambda x: (priority_map.get(x["priority"], 4), -x["fatigue"]))
+            consecutive = consecutives[i]
+            if consecutive >= 3:
+                reasons.append(f"{consecutive} consecutive starts - rotation recommended")
+                if priority == "Low":
+                    priority = "Medium"
+                    status = "Heavy Usage"
+                    action = "Rotate"
+
+            # Normalize sharpness and condition for display
+            match_sharpness, condition = sharpnesses[i], conditions[i]
+            sharpness_pct = match_sharpness / 10000 if _notna(match_sharpness) else 1.0
+            condition_pct = condition if _notna(condition) else 100
+            if condition_pct > 100:
+                condition_pct = condition_pct / 100
+
+            append({
+                "name": player_name,
+                "fatigue": fatigue,
+                "condition": condition_pct,
+                "sharpness": sharpness_pct,
+                "status": status,
+                "action": action,
+                "priority": priority,
+                "reasons": reasons,
+                "threshold": threshold,
+                "recovery_days": recovery_days,
+                "recovery_method": recovery_method,
+                "fatigue_percentage": percentages[i],
+                "warning_threshold": warning_threshold
+            })
 
         return recommendations
 
-# --- Custom JSON Encoder to handle numpy types ---
-class NumpyEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, (np.int_, np.intc, np.intp, np.int8,
-                            np.int16, np.int32, np.int64, np.uint8,
-                            np.uint16, np.uint32, np.uint64)):
-            return int(obj)
-        elif isinstance(obj, (np.float_, np.float16, np.float32, 
-                              np.float64)):
-            return float(obj)
-        elif isinstance(obj, (np.ndarray,)):
-            return obj.tolist()
-        elif isinstance(obj, (np.bool_)):
-            return bool(obj)
-        return json.JSONEncoder.default(self, obj)
-
 def main():
     try:
-        # Read JSON from stdin (if any needed, usually none for just getting list)
-        input_str = sys.stdin.read()
-        
-        # 1. UPDATE DATA FROM EXCEL
-        with suppress_stdout():
-            data_manager.update_player_data()
+        # 1. UPDATE DATA FROM EXCEL (skipped when the CSV is already up to date)
+        if not data_manager.player_data_is_current():
+            with suppress_stdout():
+                data_manager.update_player_data()
         
         status_file = 'players-current.csv'
         abilities_file = 'players-current.csv'
@@ -212,7 +230,7 @@ def main():
         advisor = ApiRestAdvisor(status_file, abilities_file)
         recommendations = advisor.get_rest_recommendations()
         
-        print(json.dumps({"success": True, "recommendations": recommendations}, cls=NumpyEncoder))
+        write_json({"success": True, "recommendations": recommendations})
         
     except Exception as e:
         print(json.dumps({"success": False, "error": str(e)}))
@@ -9,7 +9,6 @@ Uses the same effective rating formula as the match selector but with ideal cond
 import sys
 import os
 import json
-import contextlib
 import pandas as pd
 import numpy as np
 from scipy.optimize import linear_sum_assignment
@@ -19,18 +18,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'
 
 from fm_match_ready_selector import MatchReadySelector, normalize_name, MIN_POSITION_FAMILIARITY
 import data_manager
-
-
-@contextlib.contextmanager
-def suppress_stdout():
-    """Context manager to suppress stdout during initialization of parent class."""
-    with open(os.devnull, 'w') as devnull:
-        old_stdout = sys.stdout
-        sys.stdout = devnull
-        try:
-            yield
-        finally:
-            sys.stdout = old_stdout
+from api_utils import suppress_stdout, write_json
 
 
 class ApiRotationSelector(MatchReadySelector):
@@ -60,105 +48,100 @@ class ApiRotationSelector(MatchReadySelector):
             ('STC', 'Striker_Familiarity', 'Striker')
         ]
 
-    def calculate_ideal_effective_rating(self, row, skill_col, ability_col):
+    def calculate_ideal_effective_rating_vec(self, df, skill_col, ability_col):
         """
-        Calculate effective rating under ideal conditions.
+        Calculate effective ratings under ideal conditions for every player in df at one position.
 
         Uses the same base rating + familiarity penalty as the match selector,
-        but without any match-day factors (condition, sharpness, fatigue, rotation, etc.)
+        but without any match-day factors (condition, sharpness, fatigue, rotation, etc.).
+        This is the hierarchy's pure ability rating, so it uses the shared vectorized
+        implementation from MatchReadySelector.
 
         NOTE: Injured players ARE included - this is for squad planning under ideal
         conditions, not match-day selection. Injuries are temporary.
 
         Args:
-            row: Player data row
+            df: Player DataFrame
             skill_col: FM positional skill column (1-20)
             ability_col: Composite ability column (50-110)
 
         Returns:
-            Effective rating (higher is better, scale ~50-200), or -999.0 if unavailable
+            Array of effective ratings aligned with df rows, -999.0 where unavailable
         """
-        # Get positional skill rating (FM 1-20 familiarity)
-        skill_rating = row.get(skill_col, 0)
-        if pd.isna(skill_rating) or skill_rating < 1:
-            return -999.0
-
-        # Check if below minimum familiarity threshold (12 = Competent)
-        below_threshold = skill_rating < MIN_POSITION_FAMILIARITY
-
-        # Get ability rating (composite 50-110, keep full scale for CA/PA-like range)
-        if ability_col and ability_col in row.index:
-            ability_rating = row.get(ability_col, 0)
-            if pd.notna(ability_rating) and ability_rating > 0:
-                # Use ability rating as base (keep full scale, don't divide)
-                base_rating = float(ability_rating)
-            else:
-                # Fall back to skill rating scaled up
-                base_rating = float(skill_rating) * 5.0
-        else:
-            # No ability data, use skill rating scaled up
-            base_rating = float(skill_rating) * 5.0
+        return self._calculate_pure_ability_rating_vec(df, skill_col, ability_col)
 
-        effective_rating = base_rating
+    def _build_ideal_cost_matrix(self, df):
+        """
+        Build the assignment cost matrix (players x formation slots) for df.
 
-        # Apply positional familiarity penalty based on skill rating and Versatility
-        # This is the key factor that penalizes playing out of position
-        versatility = row.get('Versatility', 10)
-        familiarity_penalty = self._get_familiarity_penalty(skill_rating, versatility)
-        effective_rating *= (1 - familiarity_penalty)
+        Cells hold the negated ideal rating, or 999.0 where the player cannot play
+        the slot, so the Hungarian solver avoids them.
+        """
+        # Initialize with LARGE POSITIVE value so invalid entries are avoided
+        n_players = len(df)
+        n_positions = len(self.formation)
+        cost_matrix = np.full((n_players, n_positions), 999.0)
 
-        # Apply heavy penalty for players below minimum familiarity threshold
-        # This discourages selecting "Unconvincing" or worse players
-        if below_threshold:
-            effective_rating *= 0.30  # 70% penalty
+        # One vectorized rating pass per distinct (skill, ability) column pair, so slots
+        # that share columns (e.g. DC1/DC2) reuse the same ratings
+        slots_by_columns = {}
+        for j, (pos_name, skill_col, ability_col) in enumerate(self.formation):
+            slots_by_columns.setdefault((skill_col, ability_col), []).append(j)
 
-        return effective_rating
+        for (skill_col, ability_col), slots in slots_by_columns.items():
+            ratings = self.calculate_ideal_effective_rating_vec(df, skill_col, ability_col)
+            valid = ratings > -999.0
+            for j in slots:
+                cost_matrix[valid, j] = -ratings[valid]  # Negative for minimization
 
-    def select_ideal_xi(self, exclude_players=None):
+        return cost_matrix
+
+    def select_ideal_xi(self, exclude_players=None, cost_matrix=None):
         """
         Select optimal XI using ideal effective ratings (Hungarian algorithm).
 
         Args:
             exclude_players: Set of player names to exclude from selection
+            cost_matrix: Optional cost matrix already built over all rows of self.df
+                         (see _build_ideal_cost_matrix); rows of excluded players are dropped
 
         Returns:
             Dictionary mapping position to (player_name, rating, player_row)
         """
-        # Filter available players
-        available_df = self.df.copy()
+        # Positions of the available players in self.df (the frame itself is not copied)
         if exclude_players:
-            available_df = available_df[~available_df['Name'].isin(exclude_players)]
-        available_df = available_df.reset_index(drop=True)
+            available_idx = np.flatnonzero(~self.df['Name'].isin(exclude_players).to_numpy())
+        else:
+            available_idx = np.arange(len(self.df))
 
-        if available_df.empty:
+        if len(available_idx) == 0:
             return {}
 
-        # Build cost matrix (negative ratings for minimization)
-        # Initialize with LARGE POSITIVE value so invalid entries are avoided
-        n_players = len(available_df)
-        n_positions = len(self.formation)
-        cost_matrix = np.full((n_players, n_positions), 999.0)
-
-        for i in range(n_players):
-            player = available_df.iloc[i]
-            for j, (pos_name, skill_col, ability_col) in enumerate(self.formation):
-                rating = self.calculate_ideal_effective_rating(player, skill_col, ability_col)
-                if rating > -999.0:
-                    cost_matrix[i, j] = -rating  # Negative for minimization
+        # Build cost matrix (negative ratings for minimization), or reuse the rows
+        # of a matrix built for the whole squad
+        if cost_matrix is None:
+            available_df = self.df.iloc[available_idx] if exclude_players else self.df
+            cost_matrix = self._build_ideal_cost_matrix(available_df)
+        else:
+            cost_matrix = cost_matrix[available_idx]
 
-        # Solve the assignment problem using Hungarian algorithm
-        row_ind, col_ind = linear_sum_assignment(cost_matrix)
+        # Solve the assignment problem using Hungarian algorithm. Players with no valid
+        # slot can only take a placeholder cell, so they are left out of the solve
+        candidate_rows = np.flatnonzero((cost_matrix < 998.0).any(axis=1))
+        row_ind, col_ind = linear_sum_assignment(cost_matrix[candidate_rows])
+        row_ind = candidate_rows[row_ind]
 
         # Build result dictionary
         selected_xi = {}
         for i, j in zip(row_ind, col_ind):
             pos_name = self.formation[j][0]
-            player = available_df.iloc[i]
             cost_value = cost_matrix[i, j]
 
             # Only include players with valid ratings (not 999.0 placeholder)
             if cost_value < 998.0:  # Valid assignment (negative of actual rating)
                 rating = -cost_value
+                # Only the selected rows are materialized as Series
+                player = self.df.iloc[available_idx[i]]
                 selected_xi[pos_name] = (player['Name'], rating, player)
 
         return selected_xi
@@ -175,14 +158,18 @@ class ApiRotationSelector(MatchReadySelector):
                 'teamRatings': { 'firstXIAverage', 'secondXIAverage' }
             }
         """
+        # Ratings do not depend on who is excluded, so rate the whole squad once
+        # and let the Second XI solve reuse the remaining rows
+        cost_matrix = self._build_ideal_cost_matrix(self.df)
+
         # Select First XI
-        first_xi = self.select_ideal_xi()
+        first_xi = self.select_ideal_xi(cost_matrix=cost_matrix)
 
         # Get names of First XI players
         first_xi_players = {name for name, _, _ in first_xi.values()}
 
         # Select Second XI (excluding First XI players)
-        second_xi = self.select_ideal_xi(exclude_players=first_xi_players)
+        second_xi = self.select_ideal_xi(exclude_players=first_xi_players, cost_matrix=cost_matrix)
 
         # Enrich both squads with player metadata
         first_xi_data = self._enrich_squad(first_xi)
@@ -217,34 +204,47 @@ class ApiRotationSelector(MatchReadySelector):
         """
         enriched = {}
 
+        # Pull the selected players' display columns once, with a missing-value mask
+        # per column, instead of a .get() and pd.notna() per field and player
+        selected = self.df.loc[[player.name for player_name, _, player in squad_dict.values() if player_name]]
+        n = len(selected)
+
+        def column(names, default):
+            # First present column wins, matching the nested .get() fallbacks
+            for name in names:
+                if name in selected.columns:
+                    return selected[name].to_numpy(), selected[name].notna().to_numpy()
+            return [default] * n, [True] * n
+
+        ages, age_known = column(['Age'], 0)
+        cas, ca_known = column(['CA'], 0)
+        pas, pa_known = column(['PA'], 0)
+        # Try 'Best Position' first, then fall back to 'Positions'
+        natural_positions, natural_position_known = column(['Best Position', 'Positions'], 'Unknown')
+        conditions, condition_known = column(['Condition', 'Condition (%)'], 100)
+        fatigues, fatigue_known = column(['Fatigue'], 0)
+        sharpnesses, sharpness_known = column(['Match Sharpness'], 10000)
+
+        k = 0
         for position, (player_name, rating, player) in squad_dict.items():
             if not player_name:
                 enriched[position] = None
                 continue
 
-            # Get player attributes
-            age = player.get('Age', 0)
-            ca = player.get('CA', 0)
-            pa = player.get('PA', 0)
-            # Try 'Best Position' first, then fall back to 'Positions'
-            natural_position = player.get('Best Position', player.get('Positions', 'Unknown'))
-
             # Get condition (normalize if needed)
-            condition = player.get('Condition', player.get('Condition (%)', 100))
-            if pd.notna(condition):
+            condition = conditions[k]
+            if condition_known[k]:
                 if condition > 100:
                     condition = condition / 100  # Was stored as 0-10000
             else:
                 condition = 100
 
             # Get fatigue (raw value)
-            fatigue = player.get('Fatigue', 0)
-            if pd.isna(fatigue):
-                fatigue = 0
+            fatigue = fatigues[k] if fatigue_known[k] else 0
 
             # Get match sharpness (normalize to 0-100)
-            sharpness = player.get('Match Sharpness', 10000)
-            if pd.notna(sharpness):
+            sharpness = sharpnesses[k]
+            if sharpness_known[k]:
                 if sharpness > 100:
                     sharpness = sharpness / 100  # Convert 0-10000 to 0-100
             else:
@@ -253,43 +253,25 @@ class ApiRotationSelector(MatchReadySelector):
             enriched[position] = {
                 'name': player_name,
                 'rating': round(rating, 1) if pd.notna(rating) else 0,
-                'age': int(age) if pd.notna(age) else 0,
-                'ca': int(ca) if pd.notna(ca) else 0,
-                'pa': int(pa) if pd.notna(pa) else 0,
-                'condition': round(condition, 1) if pd.notna(condition) else 100,
-                'fatigue': round(fatigue, 0) if pd.notna(fatigue) else 0,
-                'sharpness': round(sharpness, 1) if pd.notna(sharpness) else 100,
-                'naturalPosition': str(natural_position) if pd.notna(natural_position) else 'Unknown'
+                'age': int(ages[k]) if age_known[k] else 0,
+                'ca': int(cas[k]) if ca_known[k] else 0,
+                'pa': int(pas[k]) if pa_known[k] else 0,
+                'condition': round(condition, 1),
+                'fatigue': round(fatigue, 0),
+                'sharpness': round(sharpness, 1),
+                'naturalPosition': str(natural_positions[k]) if natural_position_known[k] else 'Unknown'
             }
+            k += 1
 
         return enriched
 
 
-# --- Custom JSON Encoder to handle numpy types ---
-class NumpyEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, (np.int_, np.intc, np.intp, np.int8,
-                            np.int16, np.int32, np.int64, np.uint8,
-                            np.uint16, np.uint32, np.uint64)):
-            return int(obj)
-        elif isinstance(obj, (np.float_, np.float16, np.float32,
-                              np.float64)):
-            return float(obj)
-        elif isinstance(obj, (np.ndarray,)):
-            return obj.tolist()
-        elif isinstance(obj, (np.bool_)):
-            return bool(obj)
-        return json.JSONEncoder.default(self, obj)
-
-
 def main():
     try:
-        # Read JSON from stdin (may contain file paths)
-        input_str = sys.stdin.read()
-
-        # 1. UPDATE DATA FROM EXCEL
-        with suppress_stdout():
-            data_manager.update_player_data()
+        # 1. UPDATE DATA FROM EXCEL (skipped when the CSV is already up to date)
+        if not data_manager.player_data_is_current():
+            with suppress_stdout():
+                data_manager.update_player_data()
 
         # Use default status file
         status_file = 'players-current.csv'
@@ -297,7 +279,7 @@ def main():
         selector = ApiRotationSelector(status_file)
         result = selector.get_squads_for_api()
 
-        print(json.dumps(result, cls=NumpyEncoder))
+        write_json(result)
 
     except Exception as e:
         import traceback
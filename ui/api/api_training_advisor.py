@@ -1,26 +1,15 @@
 import sys
 import os
 import json
-import contextlib
 import pandas as pd
-import numpy as np
 
 # Add root directory to sys.path to allow importing from root scripts
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 
 from fm_training_advisor import TrainingAdvisor
 import data_manager
+from api_utils import suppress_stdout, write_json
 
-@contextlib.contextmanager
-def suppress_stdout():
-    """Context manager to suppress stdout during initialization of parent class."""
-    with open(os.devnull, 'w') as devnull:
-        old_stdout = sys.stdout
-        sys.stdout = devnull
-        try:
-            yield
-        finally:
-            sys.stdout = old_stdout
 
 class ApiTrainingAdvisor(TrainingAdvisor):
     """
@@ -54,22 +43,6 @@ class ApiTrainingAdvisor(TrainingAdvisor):
                 # Use 'Striker' for ability because we restored it in step 1
                 self.position_mapping['ST'] = ('Striker_Familiarity', 'Striker')
 
-# --- Custom JSON Encoder to handle numpy types ---
-class NumpyEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, (np.int_, np.intc, np.intp, np.int8,
-                            np.int16, np.int32, np.int64, np.uint8,
-                            np.uint16, np.uint32, np.uint64)):
-            return int(obj)
-        elif isinstance(obj, (np.float_, np.float16, np.float32, 
-                              np.float64)):
-            return float(obj)
-        elif isinstance(obj, (np.ndarray,)):
-            return obj.tolist()
-        elif isinstance(obj, (np.bool_)):
-            return bool(obj)
-        return json.JSONEncoder.default(self, obj)
-
 def main():
     try:
         # Read JSON from stdin
@@ -167,7 +140,7 @@ def main():
         if export_data:
             pd.DataFrame(export_data).to_csv(output_path, index=False, encoding='utf-8-sig')
 
-        print(json.dumps({"success": True, "recommendations": enriched_recs}, cls=NumpyEncoder))
+        write_json({"success": True, "recommendations": enriched_recs})
         
     except Exception as e:
         print(json.dumps({"success": False, "error": str(e)}))
@@ -0,0 +1,59 @@
+"""
+Shared helpers for the UI API scripts.
+
+Each api_*.py script is spawned by Electron with ui/api as its script
+directory, so these helpers are imported as a sibling module.
+"""
+import sys
+import os
+import json
+import contextlib
+import numpy as np
+
+
+@contextlib.contextmanager
+def suppress_stdout():
+    """Context manager to suppress stdout during initialization."""
+    with open(os.devnull, 'w') as devnull:
+        old_stdout = sys.stdout
+        sys.stdout = devnull
+        try:
+            yield
+        finally:
+            sys.stdout = old_stdout
+
+
+# --- Custom JSON Encoder to handle numpy types ---
+class NumpyEncoder(json.JSONEncoder):
+    # Exact-type dispatch: one dict lookup instead of walking isinstance chains per value
+    _NP_DISPATCH = {
+        **dict.fromkeys((np.int8, np.int16, np.int32, np.int64, np.intc, np.intp,
+                         np.uint8, np.uint16, np.uint32, np.uint64), int),
+        **dict.fromkeys((np.float16, np.float32, np.float64), float),
+        np.bool_: bool,
+        np.ndarray: lambda obj: obj.tolist(),
+    }
+
+    def default(self, obj):
+        converter = self._NP_DISPATCH.get(type(obj))
+        if converter is not None:
+            return converter(obj)
+        if isinstance(obj, np.integer):
+            return int(obj)
+        elif isinstance(obj, np.floating):
+            return float(obj)
+        elif isinstance(obj, np.ndarray):
+            return obj.tolist()
+        elif isinstance(obj, np.bool_):
+            return bool(obj)
+        return json.JSONEncoder.default(self, obj)
+
+
+def write_json(payload):
+    """
+    Write a JSON payload to stdout.
+
+    json.dumps escapes non-ASCII characters, so the Electron side can decode
+    stdout chunk by chunk without splitting a multi-byte character.
+    """
+    print(json.dumps(payload, cls=NumpyEncoder))